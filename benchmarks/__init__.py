@@ -0,0 +1 @@
+"""Стенды производительности Terneo BX (не входят в интеграцию)."""
@@ -0,0 +1,161 @@
+"""Сравнение табличного декодера с прежним разбором ответа в координаторе.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_decoder --repeat 20000
+
+legacy_decode - разбор из TerneoCoordinator._build_data до перехода на
+decoder.py (цепочка get()/int()/16 по фиксированному набору ключей),
+без обращения к HA. Оба варианта разбирают один и тот же ответ: все
+параметры из PARAM_TYPES и телеметрию в том виде, в каком ее отдает
+устройство. table_cached - разбор с кэшем координатора, когда параметры
+не изменились с прошлого опроса (обычный опрос), table - когда изменились
+(после записи). Отчет (JSON) - время одного разбора в микросекундах.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from custom_components.terneo_bx.const import PARAM_TYPES  # noqa: E402
+from custom_components.terneo_bx.decoder import DECODER  # noqa: E402
+
+PAR = [[param_id, param_type, str(param_id % 40)] for param_id, param_type in PARAM_TYPES.items()]
+TELEMETRY = {
+    "sn": "0123456789ABCDEF",
+    "t.0": "356",
+    "t.1": "401",
+    "t.5": "-37",
+    "f.0": "1",
+    "f.1": "0",
+    "m.0": "0",
+    "o.0": "-55",
+}
+
+
+def legacy_decode(par: list, telemetry: dict) -> dict:
+    """Прежний разбор (без формирования итогового словаря HA)."""
+    temp_air_raw = telemetry.get("t.0")
+    temp_air = round((int(temp_air_raw) / 16), 2) if temp_air_raw is not None else None
+    temp_floor_raw = telemetry.get("t.1")
+    temp_floor = round((int(temp_floor_raw) / 16), 2) if temp_floor_raw is not None else None
+    temp_external_raw = telemetry.get("t.5")
+    temp_external = round((int(temp_external_raw) / 16), 2) if temp_external_raw is not None else None
+    raw_pwr = telemetry.get("f.0")
+    power = int(raw_pwr) if raw_pwr is not None else 0
+    wifi_rssi_raw = telemetry.get("o.0")
+    wifi_rssi = int(wifi_rssi_raw) if wifi_rssi_raw is not None else None
+
+    params_dict = {}
+    for item in par:
+        if len(item) >= 3:
+            params_dict[item[0]] = item[2]
+    target_temp_raw = params_dict.get(31)
+    target_temp = int(target_temp_raw) if target_temp_raw is not None else None
+    mode_raw = params_dict.get(2)
+    mode = int(mode_raw) if mode_raw is not None else 0
+    control_type_raw = params_dict.get(3)
+    control_type = int(control_type_raw) if control_type_raw is not None else None
+    manual_air_raw = params_dict.get(4)
+    manual_air = int(manual_air_raw) if manual_air_raw is not None else None
+    manual_floor_raw = params_dict.get(5)
+    manual_floor = int(manual_floor_raw) if manual_floor_raw is not None else None
+    power_w_raw = params_dict.get(17)
+    if power_w_raw is not None:
+        power_w_int = int(power_w_raw)
+        power_w = power_w_int * 10 if power_w_int <= 150 else 1500 + (power_w_int * 20)
+    else:
+        power_w = None
+    histeresis_raw = params_dict.get(19)
+    histeresis = int(histeresis_raw) / 10 if histeresis_raw is not None else None
+    power_off_raw = params_dict.get(125)
+    power_off = int(power_off_raw) if power_off_raw is not None else 0
+    hvac_mode_raw = params_dict.get(118)
+    hvac_mode = int(hvac_mode_raw) if hvac_mode_raw is not None else 0
+    brightness_raw = params_dict.get(23)
+    brightness = int(brightness_raw) if brightness_raw is not None else None
+    return {
+        "temp_air": temp_air,
+        "temp_floor": temp_floor,
+        "temp_external": temp_external,
+        "power": power,
+        "power_w": power_w,
+        "target_temp": target_temp,
+        "mode": mode,
+        "control_type": control_type,
+        "manual_air": manual_air,
+        "manual_floor": manual_floor,
+        "histeresis": histeresis,
+        "power_off": power_off,
+        "hvac_mode": hvac_mode,
+        "wifi_rssi": wifi_rssi,
+        "params_dict": params_dict,
+        "brightness": brightness,
+    }
+
+
+# Соседние опросы: температура воздуха сдвинулась на шаг
+TELEMETRY_NEXT = {**TELEMETRY, "t.0": "357"}
+
+
+def measure(func, repeat: int) -> float:
+    """Лучшее из пяти прогонов, микросекунды на один разбор.
+
+    Каждый вызов получает новый список par (как после json.loads), а
+    телеметрия чередуется; время подготовки аргументов вычитается.
+    """
+    samples = [TELEMETRY, TELEMETRY_NEXT]
+
+    def prepare(call):
+        counter = iter(range(1 << 62))
+        return lambda: call([list(item) for item in PAR], samples[next(counter) & 1])
+
+    def best(timer):
+        return min(timer.repeat(5, repeat)) / repeat
+
+    overhead = best(timeit.Timer(prepare(lambda par, telemetry: None)))
+    elapsed = best(timeit.Timer(prepare(func))) - overhead
+    return round(elapsed * 1e6, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    legacy = measure(legacy_decode, args.repeat)
+    table = measure(DECODER.decode, args.repeat)
+    # Обычный опрос: параметры те же, что в прошлый раз (кэш координатора)
+    cache = {}
+    cached = measure(lambda par, telemetry: DECODER.decode(par, telemetry, cache), args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "params": len(PAR),
+        "telemetry_keys": len(TELEMETRY),
+        "legacy_us": legacy,
+        "table_us": table,
+        "table_cached_us": cached,
+        "speedup": round(legacy / table, 2),
+        "speedup_cached": round(legacy / cached, 2),
+        # Прежний разбор декодировал только эти поля, новый - все
+        "legacy_fields": 15,
+        "table_fields": len(DECODER.param_names) + len(DECODER.telemetry_names),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
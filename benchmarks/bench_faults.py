@@ -0,0 +1,181 @@
+"""Стенд отказов: как быстро координатор замечает сбой устройства и восстанавливается.
+
+Сценарии повторяют реальные сбои: HTTP 500, обрезанный JSON, зависание
+до таймаута запроса и перезагрузка посреди опроса. Для каждого сценария
+имитатор работает нормально, затем отказ включается на --fault-duration
+секунд, после чего координатор опрашивается до восстановления.
+
+    python -m benchmarks.bench_faults --output bench_output.txt
+    python -m benchmarks.bench_faults --scenario hang --max-recover 15
+
+Измеряется:
+  detect_s   - от начала отказа до первой ошибки запроса (api.error_count)
+  recover_s  - от конца отказа до первого опроса без ошибок
+  wasted     - запросов к устройству за время отказа
+  stale_s    - максимальный возраст данных, которые отдавал координатор
+
+При превышении порогов процесс завершается с кодом 1.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+
+from .common import async_fake_device, async_test_hass, create_coordinator, write_report
+from .fake_device import FAULT_HANG, FAULT_HTTP_500, FAULT_NONE, FAULT_REBOOT, FAULT_TRUNCATED
+
+SCENARIOS = (FAULT_HTTP_500, FAULT_TRUNCATED, FAULT_HANG, FAULT_REBOOT)
+
+# Пороги по умолчанию (секунды / запросы); зависание ограничено таймаутом запроса,
+# восстановление - паузой выключателя до пробного запроса (BREAKER_BACKOFF_MIN ± разброс)
+DEFAULT_THRESHOLDS = {
+    FAULT_HTTP_500: {"detect_s": 5, "recover_s": 10, "wasted": 20, "stale_s": 30},
+    FAULT_TRUNCATED: {"detect_s": 5, "recover_s": 10, "wasted": 20, "stale_s": 30},
+    FAULT_HANG: {"detect_s": 15, "recover_s": 25, "wasted": 10, "stale_s": 60},
+    FAULT_REBOOT: {"detect_s": 5, "recover_s": 10, "wasted": 20, "stale_s": 30},
+}
+
+
+async def run_scenario(hass, fault: str, args) -> dict:
+    """Прогнать один сценарий на свежем устройстве и координаторе."""
+    async with async_fake_device(latency=args.latency, jitter=args.jitter, seed=args.seed) as device:
+        coordinator = create_coordinator(hass, device, delay_multiplier=args.delay_multiplier)
+        if args.no_pacing:
+            coordinator.calc_delay = lambda: 0.0
+        api = coordinator.api
+
+        # Прогрев: данные есть, расписание и время уже в кэше
+        await coordinator.async_refresh()
+        for _ in range(args.warmup):
+            await coordinator.async_refresh()
+        if not coordinator.last_update_success:
+            return {"error": "warmup failed", "last_error": api.last_error}
+
+        fresh_at = time.monotonic()
+        fault_start = time.monotonic()
+        fault_end = fault_start + args.fault_duration
+        requests_before = device.total_requests
+        errors_before = api.error_count
+        if fault == FAULT_REBOOT:
+            device.reboot(args.fault_duration)
+        else:
+            device.fault = fault
+
+        detected_at = None
+        recovered_at = None
+        wasted = None
+        max_stale = 0.0
+        polls = failed_polls = 0
+        deadline = fault_end + args.recover_timeout
+
+        while time.monotonic() < deadline:
+            if fault != FAULT_REBOOT and device.fault != FAULT_NONE and time.monotonic() >= fault_end:
+                device.fault = FAULT_NONE
+            if wasted is None and time.monotonic() >= fault_end:
+                wasted = device.total_requests - requests_before
+
+            errors = api.error_count
+            await coordinator.async_refresh()
+            now = time.monotonic()
+            polls += 1
+            new_errors = api.error_count - errors
+
+            if detected_at is None and api.error_count > errors_before:
+                detected_at = now
+            if not coordinator.last_update_success:
+                failed_polls += 1
+            if new_errors == 0 and coordinator.last_update_success:
+                fresh_at = now
+                if now >= fault_end:
+                    recovered_at = now
+                    break
+            elif coordinator.data is not None:
+                max_stale = max(max_stale, now - fresh_at)
+
+            await asyncio.sleep(args.poll_period)
+
+        device.fault = FAULT_NONE
+        if wasted is None:
+            wasted = device.total_requests - requests_before
+        return {
+            "detect_s": round(detected_at - fault_start, 3) if detected_at else None,
+            "recover_s": round(recovered_at - fault_end, 3) if recovered_at else None,
+            "wasted": wasted,
+            "stale_s": round(max_stale, 3),
+            "polls": polls,
+            "failed_polls": failed_polls,
+            "api_errors": api.error_count - errors_before,
+            "last_error": api.last_error,
+            "dropped": api.channel.dropped,
+            "breaker": api.breaker.as_dict(),
+        }
+
+
+def check_thresholds(fault: str, result: dict, args) -> list[str]:
+    """Список нарушенных порогов (пустой - все в норме)."""
+    limits = dict(DEFAULT_THRESHOLDS[fault])
+    for key in limits:
+        override = getattr(args, f"max_{key.split('_')[0]}")
+        if override is not None:
+            limits[key] = override
+    failures = []
+    if "error" in result:
+        return [result["error"]]
+    for key, limit in limits.items():
+        value = result.get(key)
+        if value is None:
+            failures.append(f"{key}: never reached")
+        elif value > limit:
+            failures.append(f"{key}: {value} > {limit}")
+    return failures
+
+
+async def run(args) -> dict:
+    scenarios = [args.scenario] if args.scenario else list(SCENARIOS)
+    report = {
+        "benchmark": "faults",
+        "fault_duration": args.fault_duration,
+        "poll_period": args.poll_period,
+        "scenarios": {},
+    }
+    async with async_test_hass() as hass:
+        for fault in scenarios:
+            result = await run_scenario(hass, fault, args)
+            result["failures"] = check_thresholds(fault, result, args)
+            report["scenarios"][fault] = result
+    report["passed"] = not any(result["failures"] for result in report["scenarios"].values())
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, help="только один сценарий")
+    parser.add_argument("--fault-duration", type=float, default=12.0, help="длительность отказа (с)")
+    parser.add_argument("--recover-timeout", type=float, default=60.0, help="сколько ждать восстановления (с)")
+    parser.add_argument("--poll-period", type=float, default=1.0, help="пауза между опросами (с)")
+    parser.add_argument("--warmup", type=int, default=5, help="опросов до отказа")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--delay-multiplier", type=float, default=1.5)
+    parser.add_argument("--no-pacing", action="store_true", help="убрать паузы calc_delay между запросами")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-detect", type=float, help="порог detect_s для всех сценариев")
+    parser.add_argument("--max-recover", type=float, help="порог recover_s для всех сценариев")
+    parser.add_argument("--max-wasted", type=int, help="порог wasted для всех сценариев")
+    parser.add_argument("--max-stale", type=float, help="порог stale_s для всех сценариев")
+    parser.add_argument("--output", help="файл для JSON-отчета (например bench_output.txt)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    write_report(report, args.output)
+    if not report["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
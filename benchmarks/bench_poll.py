@@ -0,0 +1,202 @@
+"""Стенд опроса и записи: настоящий TerneoApi/TerneoCoordinator против имитатора.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_poll --polls 200 --writes 100 --output bench_output.txt
+
+Отчет (JSON) содержит время одного опроса, число запросов на опрос,
+задержку записи до появления значения (оптимистично и с подтверждением
+устройства) и выделения памяти на опрос (tracemalloc).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import platform
+import time
+import tracemalloc
+
+from .common import (
+    async_fake_device,
+    async_test_hass,
+    create_coordinator,
+    summarize,
+    write_report,
+)
+
+PACKAGE_PATH = "custom_components/terneo_bx"
+
+
+async def bench_polls(coordinator, device, polls: int) -> dict:
+    """Последовательные опросы: время, запросы и фазы."""
+    durations = []
+    requests = []
+    for _ in range(polls):
+        before = device.total_requests
+        start = time.perf_counter()
+        await coordinator._async_update_data()
+        durations.append(time.perf_counter() - start)
+        requests.append(device.total_requests - before)
+    return {
+        "wall_ms": summarize(durations),
+        "requests_per_poll": {
+            "mean": round(sum(requests) / len(requests), 3),
+            "max": max(requests),
+            "by_cmd": {str(cmd): count for cmd, count in sorted(device.requests.items(), key=str)},
+        },
+    }
+
+
+async def bench_writes(coordinator, device, writes: int, poll_period: float) -> dict:
+    """Записи уставки на фоне опроса: задержка до видимости в coordinator.data."""
+    visible_at = {}
+    waiting = {}
+
+    def _on_update():
+        data = coordinator.data
+        for value, started in list(waiting.items()):
+            if data is not None and data.target_temp == value:
+                visible_at[value] = time.perf_counter() - started
+                del waiting[value]
+
+    unsub = coordinator.async_add_listener(_on_update)
+
+    async def _poll_loop():
+        while True:
+            await coordinator.async_refresh()
+            await asyncio.sleep(poll_period)
+
+    poller = asyncio.create_task(_poll_loop())
+    optimistic, confirmed, failed = [], [], 0
+    try:
+        for i in range(writes):
+            # Каждая запись - новое значение, иначе видимость не отличить
+            value = 15 + i % 20
+            if coordinator.data is not None and coordinator.data.target_temp == value:
+                value += 1
+            visible_at.pop(value, None)
+            start = time.perf_counter()
+            waiting[value] = start
+            try:
+                await coordinator.async_write_parameters({31: value})
+            except Exception:
+                failed += 1
+                waiting.pop(value, None)
+                continue
+            confirmed.append(time.perf_counter() - start)
+            if value in visible_at:
+                optimistic.append(visible_at[value])
+            waiting.pop(value, None)
+            await asyncio.sleep(0.01)
+    finally:
+        poller.cancel()
+        try:
+            await poller
+        except asyncio.CancelledError:
+            pass
+        unsub()
+
+    return {
+        "visible_ms": summarize(optimistic),
+        "confirmed_ms": summarize(confirmed),
+        "failed": failed,
+        "writer": {
+            "writes": coordinator.writer.writes,
+            "merged": coordinator.writer.merged,
+            "mismatches": coordinator.writer.mismatches,
+            "rollbacks": coordinator.writer.rollbacks,
+        },
+    }
+
+
+async def bench_allocations(coordinator, polls: int) -> dict:
+    """Память на опрос и главные места выделения в коде интеграции."""
+    tracemalloc.start(10)
+    try:
+        net, peaks = [], []
+        baseline = tracemalloc.take_snapshot()
+        for _ in range(polls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            await coordinator._async_update_data()
+            after, peak = tracemalloc.get_traced_memory()
+            net.append(after - current)
+            peaks.append(peak - current)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    stats = [
+        stat for stat in snapshot.compare_to(baseline, "lineno")
+        if PACKAGE_PATH in stat.traceback[0].filename
+    ]
+    stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+    return {
+        "net_bytes_per_poll": summarize(net, scale=1, digits=0),
+        "peak_bytes_per_poll": summarize(peaks, scale=1, digits=0),
+        "top_sites": [
+            {
+                "site": f"{stat.traceback[0].filename.split(PACKAGE_PATH)[-1].lstrip('/')}:{stat.traceback[0].lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:10]
+        ],
+    }
+
+
+async def run(args) -> dict:
+    async with async_test_hass() as hass, async_fake_device(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed
+    ) as device:
+        coordinator = create_coordinator(hass, device, delay_multiplier=args.delay_multiplier)
+        if args.no_pacing:
+            # Без пауз между запросами опроса - чистая стоимость кода и сети
+            coordinator.calc_delay = lambda: 0.0
+
+        report = {
+            "benchmark": "poll",
+            "python": platform.python_version(),
+            "device": {
+                "latency": args.latency,
+                "jitter": args.jitter,
+                "error_rate": args.error_rate,
+            },
+            "pacing": not args.no_pacing,
+        }
+        await coordinator.async_refresh()
+        report["poll"] = await bench_polls(coordinator, device, args.polls)
+        report["write"] = await bench_writes(coordinator, device, args.writes, args.poll_period)
+        report["allocations"] = await bench_allocations(coordinator, args.alloc_polls)
+        report["api"] = {
+            "errors": coordinator.api.error_count,
+            "queue_max_wait_ms": round(coordinator.api.channel.max_wait * 1000, 3),
+            "dropped": coordinator.api.channel.dropped,
+        }
+        return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--alloc-polls", type=int, default=50)
+    parser.add_argument("--poll-period", type=float, default=0.2, help="пауза фонового опроса при записи (с)")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа устройства (с)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="разброс задержки (с)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов HTTP 500")
+    parser.add_argument("--delay-multiplier", type=float, default=1.5)
+    parser.add_argument("--no-pacing", action="store_true", help="убрать паузы calc_delay между запросами")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="файл для JSON-отчета (например bench_output.txt)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Общие части стендов: запуск HomeAssistant, устройства и отчеты."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+# Корень репозитория - чтобы импортировать custom_components.terneo_bx
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.terneo_bx.coordinator import TerneoCoordinator  # noqa: E402
+from custom_components.terneo_bx.session import async_create_api, async_close_session  # noqa: E402
+
+from .fake_device import FakeTerneo  # noqa: E402
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Перцентиль по ближайшему рангу."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(values: list[float], scale: float = 1000.0, digits: int = 3) -> dict:
+    """min/mean/p50/p95/p99/max (по умолчанию секунды → миллисекунды)."""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "min": round(min(values) * scale, digits),
+        "mean": round(sum(values) / len(values) * scale, digits),
+        "p50": round(percentile(values, 50) * scale, digits),
+        "p95": round(percentile(values, 95) * scale, digits),
+        "p99": round(percentile(values, 99) * scale, digits),
+        "max": round(max(values) * scale, digits),
+    }
+
+
+@asynccontextmanager
+async def async_test_hass():
+    """Настоящий экземпляр HomeAssistant во временном каталоге."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        try:
+            yield hass
+        finally:
+            await async_close_session(hass)
+            await hass.async_stop(force=True)
+
+
+@asynccontextmanager
+async def async_fake_device(**kwargs):
+    device = FakeTerneo(**kwargs)
+    await device.start()
+    try:
+        yield device
+    finally:
+        await device.stop()
+
+
+def create_coordinator(
+    hass: HomeAssistant,
+    device: FakeTerneo,
+    scan_interval: int = 60,
+    delay_multiplier: float = 0.0,
+) -> TerneoCoordinator:
+    """Координатор с настоящим TerneoApi, смотрящий на имитатор."""
+    api = async_create_api(hass, device.host, sn=device.sn)
+    return TerneoCoordinator(
+        hass,
+        api,
+        timedelta(seconds=scan_interval),
+        device.sn,
+        device.host,
+        delay_multiplier=delay_multiplier,
+    )
+
+
+def write_report(report: dict, output: str | None) -> None:
+    """JSON-отчет в stdout и, если задан, в файл."""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
@@ -0,0 +1,190 @@
+"""Локальный имитатор термостата Terneo BX (api.cgi / test.cgi).
+
+Отвечает тем же JSON, что и устройство, на cmd 1/2/3/4 и служебные
+команды test.cgi. Задержка, разброс и доля ошибок настраиваются, а для
+стенда отказов (bench_faults.py) можно на лету включать HTTP 500,
+обрезанный JSON, зависание и перезагрузку.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+# Параметры по умолчанию: [id, тип, значение]
+DEFAULT_PARAMS = [
+    [0, 6, "0"], [1, 6, "0"], [2, 2, "0"], [3, 2, "0"], [4, 1, "22"], [5, 1, "25"],
+    [6, 1, "16"], [7, 1, "18"], [14, 2, "5"], [15, 2, "45"], [17, 4, "150"], [18, 2, "0"],
+    [19, 2, "10"], [20, 1, "0"], [21, 1, "0"], [23, 2, "5"], [25, 2, "1"], [26, 1, "45"],
+    [27, 1, "5"], [28, 2, "6"], [29, 2, "22"], [31, 2, "25"], [33, 1, "30"], [34, 1, "5"],
+    [52, 4, "1320"], [53, 4, "420"], [109, 7, "0"], [114, 7, "0"], [115, 7, "0"],
+    [117, 7, "0"], [118, 7, "0"], [120, 7, "0"], [121, 7, "0"], [122, 7, "0"],
+    [124, 7, "0"], [125, 7, "0"],
+]
+
+DEFAULT_SCHEDULE = {
+    str(day): [[360, 250], [480, 200], [1020, 250], [1320, 210]] for day in range(7)
+}
+
+# Режимы отказа
+FAULT_NONE = "none"
+FAULT_HTTP_500 = "http_500"
+FAULT_TRUNCATED = "truncated"
+FAULT_HANG = "hang"
+FAULT_REBOOT = "reboot"
+
+
+class FakeTerneo:
+    """Состояние и HTTP-сервер одного имитируемого устройства."""
+
+    def __init__(
+        self,
+        sn: str = "FAKE0000000000000001",
+        latency: float = 0.02,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.sn = sn
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fault = FAULT_NONE
+        self.reboot_until = 0.0
+        self._random = random.Random(seed)
+
+        self.params = {item[0]: list(item) for item in DEFAULT_PARAMS}
+        self.schedule = {day: [list(p) for p in periods] for day, periods in DEFAULT_SCHEDULE.items()}
+        self.temp_air = 21.5
+        self.temp_floor = 24.0
+        self.relay = 0
+
+        # Счетчики запросов: cmd -> число; отдельно ответы с ошибкой
+        self.requests = Counter()
+        self.errors = Counter()
+
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    async def start(self, port: int = 0) -> None:
+        app = web.Application()
+        app.router.add_post("/api.cgi", self._handle_api)
+        app.router.add_post("/test.cgi", self._handle_test)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reboot(self, duration: float) -> None:
+        """Устройство недоступно duration секунд (соединения сбрасываются)."""
+        self.reboot_until = time.monotonic() + duration
+
+    def tick(self) -> None:
+        """Немного изменить телеметрию (как живое устройство)."""
+        self.temp_floor += self._random.uniform(-0.1, 0.1)
+        self.temp_air += self._random.uniform(-0.05, 0.05)
+        target = int(self.params[31][2])
+        self.relay = 1 if self.temp_floor < target else 0
+
+    async def _delay(self) -> None:
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _fault_response(self, request: web.Request, key) -> web.StreamResponse | None:
+        if time.monotonic() < self.reboot_until or self.fault == FAULT_REBOOT:
+            self.errors[key] += 1
+            # Устройство перезагружается - соединение рвется без ответа
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response(status=503)
+        if self.fault == FAULT_HANG:
+            self.errors[key] += 1
+            await asyncio.sleep(3600)
+        if self.fault == FAULT_HTTP_500 or (
+            self.error_rate and self._random.random() < self.error_rate
+        ):
+            self.errors[key] += 1
+            return web.Response(status=500, text="Internal Server Error")
+        return None
+
+    async def _handle_api(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = json.loads(await request.text())
+        except ValueError:
+            return web.Response(status=400, text="Bad Request")
+        cmd = body.get("cmd")
+        self.requests[cmd] += 1
+        await self._delay()
+        failure = await self._fault_response(request, cmd)
+        if failure is not None:
+            return failure
+
+        result = self._dispatch(cmd, body)
+        text = json.dumps(result)
+        if self.fault == FAULT_TRUNCATED:
+            self.errors[cmd] += 1
+            text = text[: len(text) // 2]
+        return web.Response(text=text, content_type="application/json")
+
+    def _dispatch(self, cmd, body: dict) -> dict:
+        if cmd == 1:
+            if "par" in body:
+                for param_id, param_type, value in body["par"]:
+                    self.params[param_id] = [param_id, param_type, str(value)]
+                return {"success": "true"}
+            return {"sn": self.sn, "par": [list(item) for item in self.params.values()]}
+        if cmd == 2:
+            if "tt" in body:
+                for day, periods in body["tt"].items():
+                    self.schedule[str(day)] = [list(p) for p in periods]
+                return {"success": "true"}
+            return {"sn": self.sn, "tt": self.schedule}
+        if cmd == 3:
+            return {"sn": self.sn, "time": int(time.time())}
+        if cmd == 4:
+            self.tick()
+            return {
+                "sn": self.sn,
+                "t.0": str(round(self.temp_air * 16)),
+                "t.1": str(round(self.temp_floor * 16)),
+                "t.5": "0",
+                "f.0": str(self.relay),
+                "f.1": "0",
+                "m.0": "0",
+                "o.0": str(-55 + self._random.randint(-3, 3)),
+            }
+        return {"status": "unknown cmd"}
+
+    async def _handle_test(self, request: web.Request) -> web.StreamResponse:
+        body = await request.text()
+        self.requests["test"] += 1
+        await self._delay()
+        failure = await self._fault_response(request, "test")
+        if failure is not None:
+            return failure
+        try:
+            cmd = json.loads(body).get("cmd")
+        except ValueError:
+            cmd = body
+        if cmd == "restart":
+            self.reboot(5)
+        return web.Response(text="ok")
@@ -1,13 +1,27 @@
 import logging
 from datetime import timedelta
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
 
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, DEFAULT_DELAY_MULTIPLIER
-from .api import TerneoApi
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_DELAY_MULTIPLIER,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MAX_SCAN_INTERVAL,
+)
+from .api import CannotConnect
+from .session import async_create_api, async_close_session, async_release_channel
 from .coordinator import TerneoCoordinator
+from .scheduler import async_get_scheduler
+from .listener import async_get_listener, async_stop_listener
+from .websocket import async_register_websocket_commands
+from .schedule import parse_week
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,6 +29,7 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Terneo BX component."""
     hass.data.setdefault(DOMAIN, {})
+    async_register_websocket_commands(hass)
     return True
 
 
@@ -36,7 +51,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry.data.get("delay_multiplier", DEFAULT_DELAY_MULTIPLIER)
     )
 
-    api = TerneoApi(host, sn=serial)
+    adaptive_polling = entry.options.get("adaptive_polling", DEFAULT_ADAPTIVE_POLLING)
+    max_scan_interval = entry.options.get("max_scan_interval", DEFAULT_MAX_SCAN_INTERVAL)
+    max_timeout = entry.options.get("max_timeout")
+
+    # host - постоянный идентификатор записи (устройство, unique_id сущностей),
+    # address - текущий IP, если DHCP переместил устройство
+    address = entry.data.get("address", host)
+
+    api = async_create_api(hass, address, sn=serial, max_timeout=max_timeout)
+    entry.async_on_unload(lambda: async_release_channel(hass, api))
 
     # Если serial отсутствует - получаем его из телеметрии
     if not serial:
@@ -65,16 +89,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         serial=serial,
         host=host,
         delay_multiplier=delay_multiplier,  # Передаем параметр
+        adaptive_polling=adaptive_polling,
+        max_interval=timedelta(seconds=max_scan_interval),
     )
 
-    # первый fetch данных
-    await coordinator.async_config_entry_first_refresh()
+    # первый fetch данных (с учетом общего лимита параллельных опросов)
+    scheduler = async_get_scheduler(hass)
+    await scheduler.async_first_refresh(coordinator)
 
     # сохраняем API и coordinator
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "api": api,
         "coordinator": coordinator,
+        "options": dict(entry.options),  # для async_reload_entry
     }
 
     # запускаем платформы
@@ -83,6 +111,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         ["climate", "sensor", "binary_sensor", "switch", "number", "calendar"]
     )
 
+    # Дальнейшие опросы - через общий планировщик
+    scheduler.async_register(host, coordinator)
+    entry.async_on_unload(lambda: scheduler.async_unregister(host))
+    entry.async_on_unload(coordinator.async_shutdown)
+
+    # Телеметрия из UDP-рассылки устройства (если порт удалось занять)
+    listener = await async_get_listener(hass)
+    if listener is not None and serial:
+        listener.async_register(serial, coordinator)
+        entry.async_on_unload(lambda: listener.async_unregister(serial))
+
     # Регистрируем сервисы (только один раз)
     await _register_services(hass)
 
@@ -116,6 +155,22 @@ async def _register_services(hass: HomeAssistant):
         _LOGGER.error(f"Could not find device for entity_id: {entity_id}")
         return None
     
+    def _find_coordinator_by_host(host: str):
+        """Найти координатор устройства по host."""
+        for entry_id, entry_data in hass.data[DOMAIN].items():
+            coordinator = entry_data.get("coordinator")
+            if coordinator and coordinator.host == host:
+                return coordinator
+        return None
+
+    def _find_api_by_host(host: str):
+        """Найти API объект устройства по host."""
+        for entry_id, entry_data in hass.data[DOMAIN].items():
+            coordinator = entry_data.get("coordinator")
+            if coordinator and coordinator.host == host:
+                return entry_data.get("api")
+        return None
+
     async def _send_test_command(entity_id: str, cmd: str) -> bool:
         """Отправить команду на test.cgi endpoint."""
         if not entity_id:
@@ -125,27 +180,19 @@ async def _register_services(hass: HomeAssistant):
         host = await _find_device_by_entity(entity_id)
         if not host:
             return False
+
+        api = _find_api_by_host(host)
+        if not api:
+            return False
         
         try:
             _LOGGER.info(f"Sending '{cmd}' command to {host}")
-            url = f"http://{host}/test.cgi"
-            
-            import aiohttp
-            import async_timeout
-            
-            async with async_timeout.timeout(10):
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, json={"cmd": cmd}) as resp:
-                        result = await resp.text()
-                        _LOGGER.debug(f"Response from {host}: {result}")
-                        
-                        if resp.status == 200:
-                            _LOGGER.info(f"Command '{cmd}' sent successfully to {host}: {result}")
-                            return True
-                        else:
-                            _LOGGER.error(f"Command '{cmd}' failed: HTTP {resp.status}, response: {result}")
-                            return False
-                            
+            result = await api.send_test_command(cmd)
+            _LOGGER.info(f"Command '{cmd}' sent successfully to {host}: {result}")
+            return True
+        except CannotConnect as e:
+            _LOGGER.error(f"Command '{cmd}' failed for {host}: {e}")
+            return False
         except Exception as e:
             _LOGGER.error(f"Error sending '{cmd}' command to {host}: {e}", exc_info=True)
             return False
@@ -171,12 +218,9 @@ async def _register_services(hass: HomeAssistant):
             # Получаем объект entity
             entity = hass.data["entity_components"]["sensor"].get_entity(entity_id)
             
-            if entity and hasattr(entity, '_total_energy'):
+            if entity and hasattr(entity, 'async_reset'):
                 _LOGGER.info(f"Resetting energy counter for {entity_id}")
-                entity._total_energy = 0.0
-                entity._last_update = None
-                entity._last_power = 0
-                entity.async_write_ha_state()
+                entity.async_reset()
             else:
                 _LOGGER.error(f"Entity {entity_id} is not an energy sensor or doesn't support reset")
         
@@ -217,18 +261,48 @@ async def _register_services(hass: HomeAssistant):
                 return
             
             # Находим API объект
-            for entry_id, entry_data in hass.data[DOMAIN].items():
-                coordinator = entry_data.get("coordinator")
-                if coordinator and coordinator.host == host:
-                    api = entry_data.get("api")
-                    if api:
-                        api.reset_error_count()
-                        _LOGGER.info(f"API error counter reset for {host}")
-                    break
+            api = _find_api_by_host(host)
+            if api:
+                api.reset_error_count()
+                _LOGGER.info(f"API error counter reset for {host}")
         
         hass.services.async_register(DOMAIN, "reset_api_errors", reset_api_errors)
         _LOGGER.info("Registered reset_api_errors service")    
 
+    # Сервис set_schedule
+    if not hass.services.has_service(DOMAIN, "set_schedule"):
+        async def set_schedule(call):
+            """Записать недельное расписание (только изменившиеся дни)."""
+            entity_id = call.data["entity_id"]
+            try:
+                week = parse_week(call.data["schedule"])
+            except ValueError as e:
+                raise HomeAssistantError(f"Invalid schedule: {e}") from e
+
+            host = await _find_device_by_entity(entity_id)
+            coordinator = _find_coordinator_by_host(host) if host else None
+            if coordinator is None:
+                raise HomeAssistantError(f"Terneo device for {entity_id} not found")
+
+            try:
+                requests = await coordinator.async_set_schedule(week)
+            except ValueError as e:
+                raise HomeAssistantError(str(e)) from e
+            except CannotConnect as e:
+                raise HomeAssistantError(f"Failed to write schedule to {host}: {e}") from e
+            _LOGGER.info(f"Schedule for {host} written in {requests} request(s)")
+
+        hass.services.async_register(
+            DOMAIN,
+            "set_schedule",
+            set_schedule,
+            schema=vol.Schema({
+                vol.Required("entity_id"): cv.entity_id,
+                vol.Required("schedule"): dict,
+            }),
+        )
+        _LOGGER.info("Registered set_schedule service")
+
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload entry."""
@@ -247,11 +321,20 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             hass.services.async_remove(DOMAIN, "blink")
             hass.services.async_remove(DOMAIN, "restart")
             hass.services.async_remove(DOMAIN, "reset_api_errors")
+            hass.services.async_remove(DOMAIN, "set_schedule")
             _LOGGER.info("Removed all Terneo services")
 
+            # Последнее устройство выгружено - закрываем общий пул и приемник
+            await async_close_session(hass)
+            async_stop_listener(hass)
+
     return unload_ok
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry when options change."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is not None and entry_data.get("options") == dict(entry.options):
+        # Изменились только data (например, новый адрес устройства) - перезагрузка не нужна
+        return
     await hass.config_entries.async_reload(entry.entry_id)
\ No newline at end of file
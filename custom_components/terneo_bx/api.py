@@ -1,62 +1,178 @@
-import logging, aiohttp, async_timeout, asyncio
+import logging, aiohttp, asyncio, json, time
 from typing import Any, Dict
 from datetime import datetime
-from .const import API_ENDPOINT, CMD_TELEMETRY, CMD_PARAMS, CMD_SET_PARAM, PARAM_TYPES
+from .const import API_ENDPOINT, TEST_ENDPOINT, CMD_TELEMETRY, CMD_PARAMS, CMD_SET_PARAM, CMD_SCHEDULE, PARAM_TYPES, BACKGROUND_MAX_WAIT
+from .metrics import (
+    TerneoApiMetrics,
+    KIND_PARAMS,
+    KIND_SCHEDULE,
+    KIND_TIME,
+    KIND_TELEMETRY,
+    KIND_WRITE,
+    KIND_TEST,
+    OUTCOME_SUCCESS,
+    OUTCOME_TIMEOUT,
+    OUTCOME_HTTP_ERROR,
+    OUTCOME_JSON_ERROR,
+    OUTCOME_ERROR,
+)
+from .breaker import TerneoCircuitBreaker
+from .timeouts import TerneoTimeouts, create_trace_config
+from .channel import (
+    TerneoRequestChannel,
+    PRIORITY_WRITE,
+    PRIORITY_USER,
+    PRIORITY_POLL,
+    PRIORITY_BACKGROUND,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 class CannotConnect(Exception):
     pass
 
+class CircuitOpen(CannotConnect):
+    """Устройство недоступно, запрос отклонен без обращения к нему."""
+
 class TerneoApi:
-    def __init__(self, host: str, sn: str | None = None):
+    def __init__(
+        self,
+        host: str,
+        sn: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+        channel: TerneoRequestChannel | None = None,
+        max_timeout: float | None = None,
+    ):
         self.host = host.rstrip("/")
         self.sn = sn
+        # Общая сессия (пул соединений); без неё каждый запрос открывает свою
+        self._session = session
+        # Очередь запросов к устройству (общая для всех TerneoApi этого host)
+        self.channel = channel or TerneoRequestChannel(self.host)
         self.error_count = 0  
         self.last_error = None  
         self.last_success = None  
         self.last_request_duration = None
+        # Гистограммы задержек и исходы запросов по типам команд
+        self.metrics = TerneoApiMetrics()
+        # Быстрый отказ после серии ошибок подряд
+        self.breaker = TerneoCircuitBreaker(self.host)
+        # Таймауты подключения и чтения по наблюдаемой задержке
+        self.timeouts = TerneoTimeouts(max_timeout)
         _LOGGER.info("TerneoApi initialized with host=%s, sn=%s", host, sn)
 
-    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def set_host(self, host: str) -> None:
+        """Сменить адрес устройства на лету (DHCP выдал новый IP)."""
+        self.host = host.rstrip("/")
+        self.channel.host = self.host
+        self.breaker.host = self.host
+        # Ошибки относились к старому адресу
+        self.breaker.reset()
+
+    async def _send(self, url: str, payload: Dict[str, Any], kind: str, timing: dict) -> tuple[int, str]:
+        """POST через общую сессию (или временную, если сессия не задана).
+
+        Таймауты подключения и чтения - по текущей оценке для kind; время
+        установки соединения трассировка пишет в timing["connect"].
+        """
+        timeout = self.timeouts.client_timeout(kind)
+        if self._session is not None:
+            async with self._session.post(url, json=payload, timeout=timeout, trace_request_ctx=timing) as resp:
+                return resp.status, await resp.text()
+        async with aiohttp.ClientSession(trace_configs=[create_trace_config()]) as session:
+            async with session.post(url, json=payload, timeout=timeout, trace_request_ctx=timing) as resp:
+                return resp.status, await resp.text()
+
+    async def _timed_send(self, url: str, payload: Dict[str, Any], kind: str) -> tuple[int, str]:
+        """_send с обновлением оценки задержки (успех) или таймаутов (таймаут)."""
+        timing = {}
+        start = time.monotonic()
+        try:
+            result = await self._send(url, payload, kind, timing)
+        except asyncio.TimeoutError:
+            self.timeouts.record_timeout(kind, connected="connect" in timing or "reused" in timing)
+            raise
+        self.timeouts.record(kind, time.monotonic() - start, timing.get("connect"))
+        return result
+
+    async def _post(
+        self,
+        payload: Dict[str, Any],
+        priority: int = PRIORITY_POLL,
+        max_wait: float | None = None,
+        kind: str = KIND_PARAMS,
+    ) -> Dict[str, Any]:
+        """Запрос к api.cgi через очередь устройства."""
+        return await self.channel.async_submit(lambda: self._request(payload, kind), priority, max_wait)
+
+    def _finish(self, kind: str, outcome: str, start_ns: int) -> None:
+        """Учесть длительность и исход запроса."""
+        duration_ns = time.monotonic_ns() - start_ns
+        self.last_request_duration = duration_ns / 1e6
+        self.metrics.record(kind, outcome, duration_ns)
+        if outcome == OUTCOME_SUCCESS:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def _request(self, payload: Dict[str, Any], kind: str = KIND_PARAMS) -> Dict[str, Any]:
+        if not self.breaker.allow():
+            raise CircuitOpen(f"Device unavailable, next attempt in {self.breaker.retry_in:.0f}s")
         url = f"http://{self.host}{API_ENDPOINT}"
         _LOGGER.debug("POST %s -> %s", url, payload)
-        start_time = datetime.now()
+        start_ns = time.monotonic_ns()
         try:
-            async with async_timeout.timeout(10):
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, json=payload) as resp:
-                        raw = await resp.text()
-                        # Измеряем время ответа
-                        end_time = datetime.now()
-                        self.last_request_duration = (end_time - start_time).total_seconds() * 1000
-
-                        if resp.status != 200:
-                            self.error_count += 1  
-                            self.last_error = f"HTTP {resp.status}"                           
-                            raise CannotConnect(f"HTTP {resp.status}: {raw}")
-                        try:
-                            data = await resp.json()
-                            self.last_success = datetime.now()                                                        
-                            return data
-                        except Exception as e:
-                            self.error_count += 1  
-                            self.last_error = f"Invalid JSON: {e}"                             
-                            _LOGGER.debug("Invalid JSON response: %s", raw)
-                            raise CannotConnect(f"Invalid JSON: {e}")
+            status, raw = await self._timed_send(url, payload, kind)
         except asyncio.TimeoutError:
-            end_time = datetime.now()
-            self.last_request_duration = (end_time - start_time).total_seconds() * 1000
+            self._finish(kind, OUTCOME_TIMEOUT, start_ns)
             self.error_count += 1 
             self.last_error = "Timeout"  
             raise CannotConnect("Request timeout")                        
         except Exception as e:
-            end_time = datetime.now()
-            self.last_request_duration = (end_time - start_time).total_seconds() * 1000
+            self._finish(kind, OUTCOME_ERROR, start_ns)
             self.error_count += 1 
             self.last_error = str(e)            
             raise CannotConnect(f"API request failed: {e}")
 
+        if status != 200:
+            self._finish(kind, OUTCOME_HTTP_ERROR, start_ns)
+            self.error_count += 1  
+            self.last_error = f"HTTP {status}"                           
+            raise CannotConnect(f"HTTP {status}: {raw}")
+        try:
+            data = json.loads(raw)
+        except Exception as e:
+            self._finish(kind, OUTCOME_JSON_ERROR, start_ns)
+            self.error_count += 1  
+            self.last_error = f"Invalid JSON: {e}"                             
+            _LOGGER.debug("Invalid JSON response: %s", raw)
+            raise CannotConnect(f"Invalid JSON: {e}")
+        self._finish(kind, OUTCOME_SUCCESS, start_ns)
+        self.last_success = datetime.now()                                                        
+        return data
+
+    async def send_test_command(self, cmd: str) -> str:
+        """Отправить служебную команду (blink, restart) на test.cgi."""
+        return await self.channel.async_submit(lambda: self._test_request(cmd), PRIORITY_USER)
+
+    async def _test_request(self, cmd: str) -> str:
+        url = f"http://{self.host}{TEST_ENDPOINT}"
+        _LOGGER.debug("POST %s -> %s", url, cmd)
+        start_ns = time.monotonic_ns()
+        try:
+            status, raw = await self._timed_send(url, {"cmd": cmd}, KIND_TEST)
+        except asyncio.TimeoutError:
+            self.metrics.record(KIND_TEST, OUTCOME_TIMEOUT, time.monotonic_ns() - start_ns)
+            raise CannotConnect("Request timeout")
+        except Exception as e:
+            self.metrics.record(KIND_TEST, OUTCOME_ERROR, time.monotonic_ns() - start_ns)
+            raise CannotConnect(f"Test command failed: {e}")
+        if status != 200:
+            self.metrics.record(KIND_TEST, OUTCOME_HTTP_ERROR, time.monotonic_ns() - start_ns)
+            raise CannotConnect(f"HTTP {status}: {raw}")
+        self.metrics.record(KIND_TEST, OUTCOME_SUCCESS, time.monotonic_ns() - start_ns)
+        return raw
+
     def reset_error_count(self):
         """Сброс счетчика ошибок."""
         self.error_count = 0
@@ -64,17 +180,22 @@ class TerneoApi:
         _LOGGER.info(f"Error counter reset for {self.host}")
 
     # READ
-    async def get_params(self) -> Dict[str, Any] | None:
-        return await self._post({"cmd": CMD_PARAMS})
+    async def get_params(self, priority: int = PRIORITY_POLL) -> Dict[str, Any] | None:
+        return await self._post({"cmd": CMD_PARAMS}, priority, kind=KIND_PARAMS)
 
+    # Расписание и время - фоновые чтения, устаревшие в очереди отбрасываются
     async def get_schedule(self) -> Dict[str, Any] | None:
-        return await self._post({"cmd": 2})
+        return await self._post({"cmd": 2}, PRIORITY_BACKGROUND, BACKGROUND_MAX_WAIT, KIND_SCHEDULE)
 
     async def get_time(self) -> Dict[str, Any] | None:
-        return await self._post({"cmd": 3})
+        return await self._post({"cmd": 3}, PRIORITY_BACKGROUND, BACKGROUND_MAX_WAIT, KIND_TIME)
 
-    async def get_telemetry(self) -> Dict[str, Any] | None:
-        return await self._post({"cmd": CMD_TELEMETRY})
+    async def get_telemetry(self, priority: int = PRIORITY_POLL) -> Dict[str, Any] | None:
+        return await self._post({"cmd": CMD_TELEMETRY}, priority, kind=KIND_TELEMETRY)
+
+    async def async_probe(self) -> Dict[str, Any] | None:
+        """Пробный запрос при разомкнутой цепи - самый дешевый (телеметрия)."""
+        return await self.get_telemetry(PRIORITY_USER)
 
     # WRITE: set parameter (must include sn when writing)
     async def set_parameter(self, param_id: int, value: Any, sn: str | None = None):
@@ -87,14 +208,18 @@ class TerneoApi:
         body = {"cmd": CMD_SET_PARAM, "par": [[param_id, param_type, str(value)]]}
         if sn or self.sn:
             body["sn"] = sn or self.sn        
-        return await self._post(body)
+        return await self._post(body, PRIORITY_WRITE, kind=KIND_WRITE)
 
     async def set_schedule(self, day: int, periods: list, sn: str | None = None):
         """Set schedule for single day. periods = [[minute, temp], ...]"""
-        body = {"cmd": 2, "tt": {str(day): periods}}
+        return await self.set_schedule_days({str(day): periods}, sn)
+
+    async def set_schedule_days(self, days: dict[str, list], sn: str | None = None):
+        """Записать расписание нескольких дней одним cmd=2: {"0": [[minute, temp], ...], ...}"""
+        body = {"cmd": CMD_SCHEDULE, "tt": days}
         if sn or self.sn:
             body["sn"] = sn or self.sn
-        return await self._post(body)
+        return await self._post(body, PRIORITY_WRITE, kind=KIND_WRITE)
 
     async def set_parameters(self, params: dict[int, Any], sn: str | None = None):
         """
@@ -114,7 +239,7 @@ class TerneoApi:
         if sn or self.sn:
             body["sn"] = sn or self.sn
 
-        return await self._post(body)
+        return await self._post(body, PRIORITY_WRITE, kind=KIND_WRITE)
 
 
     # HELPERS
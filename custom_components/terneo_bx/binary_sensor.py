@@ -17,7 +17,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
 class TerneoRelaySensor(CoordinatorEntity, BinarySensorEntity):
     def __init__(self, coordinator: TerneoCoordinator, host: str):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset({"power"}))
         self._host = host
         self._attr_name = f"Terneo {host} Heating Active"
         self._attr_unique_id = f"terneo_{host}_heating_active"
@@ -29,7 +29,7 @@ class TerneoRelaySensor(CoordinatorEntity, BinarySensorEntity):
 
     @property
     def is_on(self) -> bool:
-        val = self.coordinator.data.get('power',0)
+        val = self.coordinator.data.power
         try:
             return int(val) == 1
         except:
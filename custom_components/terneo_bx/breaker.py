@@ -0,0 +1,123 @@
+"""Автоматический выключатель запросов к недоступному устройству."""
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_BACKOFF_MIN,
+    BREAKER_BACKOFF_MAX,
+    BREAKER_JITTER,
+    BREAKER_PROBE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class TerneoCircuitBreaker:
+    """Размыкается после N ошибок подряд и пропускает только пробные запросы.
+
+    closed    - запросы идут как обычно;
+    open      - запросы сразу отклоняются до retry_at;
+    half_open - пропущен один пробный запрос; успех замыкает цепь, ошибка
+                снова размыкает ее с удвоенной (до предела) паузой и разбросом.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        threshold: int = BREAKER_FAILURE_THRESHOLD,
+        backoff_min: float = BREAKER_BACKOFF_MIN,
+        backoff_max: float = BREAKER_BACKOFF_MAX,
+    ):
+        self.host = host
+        self.threshold = threshold
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.state = STATE_CLOSED
+        self.failures = 0        # ошибок подряд
+        self.opened = 0          # сколько раз размыкался
+        self.rejected = 0        # запросов отклонено без обращения к устройству
+        self._backoff = backoff_min
+        self._retry_at = 0.0
+        self._probe_started = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Цепь разомкнута (в т.ч. идет пробный запрос)."""
+        return self.state != STATE_CLOSED
+
+    @property
+    def probe_due(self) -> bool:
+        """Пора отправить пробный запрос."""
+        return self.state == STATE_OPEN and time.monotonic() >= self._retry_at
+
+    @property
+    def retry_in(self) -> float:
+        """Секунд до следующей пробы (0 - цепь замкнута или проба уже разрешена)."""
+        if self.state == STATE_CLOSED:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос сейчас (в half_open - только один)."""
+        if self.state == STATE_CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == STATE_HALF_OPEN and now - self._probe_started > BREAKER_PROBE_TIMEOUT:
+            # Проба пропала без результата (например, отменена) - разрешаем новую
+            self.state = STATE_OPEN
+        if self.state == STATE_OPEN and now >= self._retry_at:
+            self.state = STATE_HALF_OPEN
+            self._probe_started = now
+            _LOGGER.debug("Circuit for %s half-open, probing", self.host)
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("Device %s is reachable again, circuit closed", self.host)
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._backoff = self.backoff_min
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self._backoff = min(self.backoff_max, self._backoff * 2)
+            self._open()
+        elif self.state == STATE_CLOSED and self.failures >= self.threshold:
+            self._backoff = self.backoff_min
+            self.opened += 1
+            self._open()
+            _LOGGER.warning(
+                "Device %s failed %d requests in a row, pausing requests for %.0fs",
+                self.host, self.failures, self.retry_in,
+            )
+
+    def reset(self) -> None:
+        """Замкнуть цепь без пробы (например, устройство сменило адрес)."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._backoff = self.backoff_min
+
+    def _open(self) -> None:
+        self.state = STATE_OPEN
+        delay = self._backoff * random.uniform(1 - BREAKER_JITTER, 1 + BREAKER_JITTER)
+        self._retry_at = time.monotonic() + delay
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_in": round(self.retry_in, 1),
+        }
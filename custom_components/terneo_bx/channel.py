@@ -0,0 +1,110 @@
+"""Приоритетный канал запросов к одному устройству."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Any, Awaitable, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+# Приоритеты (меньше - раньше)
+PRIORITY_WRITE = 0       # запись параметров и подтверждение записи
+PRIORITY_USER = 1        # команды пользователя, проверка подключения
+PRIORITY_POLL = 2        # плановый опрос параметров и телеметрии
+PRIORITY_BACKGROUND = 3  # редкие фоновые чтения (расписание, время)
+
+
+class RequestDropped(Exception):
+    """Фоновый запрос слишком долго ждал в очереди и был отброшен."""
+
+
+class ChannelClosed(RequestDropped):
+    """Очередь остановлена (выгрузка, завершение работы) до выполнения запроса."""
+
+
+class TerneoRequestChannel:
+    """Выполняет запросы к устройству строго по одному, по приоритету.
+
+    Веб-сервер контроллера плохо переносит параллельные запросы, поэтому
+    опрос, записи, проверка подключения и сервисы идут через одну очередь.
+    Запросы с max_wait, прождавшие дольше, отбрасываются (RequestDropped).
+    Если обработчик очереди остановлен (отмена, close), все ждущие
+    запросы завершаются ChannelClosed, а не висят без ответа.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self.completed = 0
+        self.dropped = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    async def async_submit(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_POLL,
+        max_wait: float | None = None,
+    ) -> Any:
+        """Поставить запрос в очередь и дождаться результата."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), loop.time(), max_wait, factory, future))
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._async_work())
+        return await future
+
+    async def _async_work(self) -> None:
+        loop = asyncio.get_running_loop()
+        future = None
+        try:
+            while self._queue:
+                priority, _, queued_at, max_wait, factory, future = heapq.heappop(self._queue)
+                if future.done():
+                    # Вызывающий уже не ждет (отменен)
+                    continue
+                waited = loop.time() - queued_at
+                if max_wait is not None and waited > max_wait:
+                    self.dropped += 1
+                    _LOGGER.debug("Dropped stale request to %s after %.1fs in queue", self.host, waited)
+                    future.set_exception(RequestDropped(f"Waited {waited:.1f}s in queue"))
+                    continue
+
+                self.last_wait = waited
+                self.max_wait = max(self.max_wait, waited)
+                try:
+                    result = await factory()
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                self.completed += 1
+        finally:
+            # Отмена или BaseException: текущий и ждущие запросы не должны висеть
+            self._fail_pending(future)
+
+    def _fail_pending(self, current: asyncio.Future | None = None) -> None:
+        futures = [item[-1] for item in self._queue]
+        self._queue.clear()
+        if current is not None:
+            futures.append(current)
+        for future in futures:
+            if not future.done():
+                future.set_exception(ChannelClosed(f"Request channel to {self.host} closed"))
+
+    def close(self) -> None:
+        """Остановить очередь: ждущие запросы завершаются ChannelClosed."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        # Задача, отмененная до первого шага, не выполнит finally
+        self._fail_pending()
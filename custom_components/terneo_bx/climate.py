@@ -12,7 +12,6 @@ from homeassistant.helpers.entity import DeviceInfo
 from .const import DOMAIN
 from .api import TerneoApi, CannotConnect
 from .coordinator import TerneoCoordinator
-import asyncio
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,7 +48,10 @@ class TerneoClimate(CoordinatorEntity, ClimateEntity):
     _attr_hvac_modes = [HVACMode.OFF, HVACMode.AUTO, HVACMode.HEAT]
 
     def __init__(self, coordinator: TerneoCoordinator, api: TerneoApi):
-        super().__init__(coordinator)
+        super().__init__(
+            coordinator,
+            context=frozenset({"temp_floor", "target_temp", "power_off", "mode"}),
+        )
         self.api = api
         self._host = coordinator.host
         self._serial = coordinator.serial
@@ -66,19 +68,37 @@ class TerneoClimate(CoordinatorEntity, ClimateEntity):
             model="Terneo BX"
         )
 
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        # Следующая уставка расписания меняется на границах периодов
+        self.async_on_remove(
+            self.coordinator.schedule_tracker.async_add_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def extra_state_attributes(self):
+        state = self.coordinator.schedule_tracker.state
+        if state is None:
+            return {}
+        return {
+            "next_setpoint": state.next_temp,
+            "next_change": state.next_start.isoformat(),
+        }
+
     @property
     def current_temperature(self):
-        return self.coordinator.data.get("temp_floor")
+        return self.coordinator.data.temp_floor
 
     @property
     def target_temperature(self):
-        return self.coordinator.data.get("target_temp")
+        return self.coordinator.data.target_temp
 
     @property
     def hvac_mode(self):
         """Определяем текущий режим HVAC."""
-        power_off = self.coordinator.data.get("power_off", 0)
-        mode = self.coordinator.data.get("mode", 0)
+        data = self.coordinator.data
+        power_off = data.power_off
+        mode = data.mode
         
         if power_off == 1:
             return HVACMode.OFF
@@ -94,17 +114,8 @@ class TerneoClimate(CoordinatorEntity, ClimateEntity):
             return
         
         try:
-            # 1. Переключаем в ручной режим обогрева
-            power_off = self.coordinator.data.get("power_off", 0)
-            current_mode = self.coordinator.data.get("mode", 0)
-            
-            if power_off == 1 or current_mode == 0:
-                await self.api.set_parameters({125: 0, 2: 1}, sn=self._serial)
-            
-            # ID=31 - setTemperature
-            await self.api.set_parameters({125: 0, 2: 1, 31: int(temperature)}, sn=self._serial)
-            await asyncio.sleep(self.coordinator.calc_delay())
-            await self.coordinator.async_refresh()
+            # Ручной режим обогрева + ID=31 (setTemperature) одной записью
+            await self.coordinator.async_write_parameters({125: 0, 2: 1, 31: int(temperature)})
         except CannotConnect:
             _LOGGER.error("Cannot connect to set temperature")
         except Exception as e:
@@ -113,15 +124,12 @@ class TerneoClimate(CoordinatorEntity, ClimateEntity):
     async def async_turn_on(self):
         """Включить устройство → всегда переход в расписание."""
         try:
-            await self.api.set_parameters(
+            await self.coordinator.async_write_parameters(
                 {
                     125: 0,  # powerOff = 0
                     2: 0,    # mode = schedule
-                },
-                sn=self._serial
+                }
             )
-            await asyncio.sleep(self.coordinator.calc_delay())
-            await self.coordinator.async_refresh()
         except CannotConnect:
             _LOGGER.error("Cannot connect to turn on device")
 
@@ -129,9 +137,7 @@ class TerneoClimate(CoordinatorEntity, ClimateEntity):
     async def async_turn_off(self):
         """Выключить устройство."""
         try:
-            await self.api.set_parameters({125: 1, 2: 1}, sn=self._serial)
-            await asyncio.sleep(self.coordinator.calc_delay())
-            await self.coordinator.async_refresh()
+            await self.coordinator.async_write_parameters({125: 1, 2: 1})
         except CannotConnect:
             _LOGGER.error("Cannot connect to turn off device")
 
@@ -142,20 +148,17 @@ class TerneoClimate(CoordinatorEntity, ClimateEntity):
         try:
             if hvac_mode == HVACMode.OFF:
                 # Выключить устройство: ID=125 (powerOff) = 1
-                await self.api.set_parameters({125: 1, 2: 1}, sn=self._serial)
+                await self.coordinator.async_write_parameters({125: 1, 2: 1})
             elif hvac_mode == HVACMode.AUTO:
                 # Режим расписания: ID=2 (mode) = 0, ID=125 (powerOff) = 0
-                await self.api.set_parameters({125: 0, 2: 0}, sn=self._serial)
+                await self.coordinator.async_write_parameters({125: 0, 2: 0})
             elif hvac_mode == HVACMode.HEAT:
                 # Ручной режим: ID=2 (mode) = 1, ID=125 (powerOff) = 0
-                await self.api.set_parameters({125: 0, 2: 1}, sn=self._serial)
+                await self.coordinator.async_write_parameters({125: 0, 2: 1})
             else:
                 _LOGGER.error(f"Unsupported HVAC mode: {hvac_mode}")
                 return
             
-            await asyncio.sleep(self.coordinator.calc_delay())
-            await self.coordinator.async_refresh()
-            
         except CannotConnect:
             _LOGGER.error("Cannot connect to set HVAC mode")
         except Exception as e:
@@ -1,10 +1,19 @@
-import asyncio, socket, voluptuous as vol
+import ipaddress, voluptuous as vol
 from homeassistant import config_entries
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+import homeassistant.helpers.config_validation as cv
+from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, BROADCAST_PORT, DEFAULT_DISCOVERY_TIMEOUT
 from .api import TerneoApi
+from .session import async_get_session
+from .channel import PRIORITY_USER
+from .discovery import async_discover, InvalidSubnet
 
 class TerneoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 2
+
+    def __init__(self):
+        # Найденные, но еще не добавленные устройства: sn -> ip
+        self._discovered: dict[str, str] = {}
+        self._scan_interval = DEFAULT_SCAN_INTERVAL
  
     async def async_step_user(self, user_input=None):
         errors = {}
@@ -22,16 +31,7 @@ class TerneoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 if not result:
                     errors['base'] = 'cannot_connect'
                 else:
-                    serial = result.get('serial')
-                    return self.async_create_entry(
-                        title=f'Terneo {host}',
-                        data={
-                            'host': host,
-                            'serial': serial,  # ← Сохраняем serial
-                            'scan_interval': scan_interval
-                        },
-                        options={'scan_interval': scan_interval}
-                    )
+                    return await self._async_create_device_entry(host, result.get('serial'), scan_interval)
         
         schema = vol.Schema({
             vol.Required('mode', default='manual'): vol.In(['manual', 'discover_broadcast']),
@@ -43,42 +43,123 @@ class TerneoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_discover_broadcast(self, user_input=None):
         errors = {}
         if user_input is not None:
-            port = user_input.get('port', 9000)
-            timeout = user_input.get('timeout', 4)
-            scan_interval = user_input.get('scan_interval', DEFAULT_SCAN_INTERVAL)
-            found = await self._async_discover(port, timeout)
-            if not found:
-                errors['base'] = 'not_found'
+            port = user_input.get('port', BROADCAST_PORT)
+            timeout = user_input.get('timeout', DEFAULT_DISCOVERY_TIMEOUT)
+            subnet = user_input.get('subnet') or None
+            self._scan_interval = user_input.get('scan_interval', DEFAULT_SCAN_INTERVAL)
+            try:
+                found = await async_discover(self.hass, port, timeout, subnet)
+            except InvalidSubnet:
+                errors['subnet'] = 'invalid_subnet'
             else:
-                host = found[0]
-                # Проверяем подключение и получаем serial
-                result = await self._async_test_connection(host)
-                if not result:
-                    errors['base'] = 'cannot_connect'
-                else:
-                    serial = result.get('serial')
-                    return self.async_create_entry(
-                        title=f'Terneo {host}',
-                        data={
-                            'host': host,
-                            'serial': serial,  # ← Сохраняем serial
-                            'scan_interval': scan_interval
-                        },
-                        options={'scan_interval': scan_interval}
-                    )
-        
+                # Уже добавленные устройства не предлагаем
+                self._discovered = {
+                    serial: host for serial, host in found.items()
+                    if not self._serial_configured(serial)
+                }
+                if self._discovered:
+                    return await self.async_step_discover_select()
+                errors['base'] = 'no_new_devices' if found else 'not_found'
+
         schema = vol.Schema({
-            vol.Optional('port', default=9000): int,
-            vol.Optional('timeout', default=4): int,
+            vol.Optional('subnet', default=await self._async_default_subnet()): str,
+            vol.Optional('port', default=BROADCAST_PORT): int,
+            vol.Optional('timeout', default=DEFAULT_DISCOVERY_TIMEOUT): int,
             vol.Optional('scan_interval', default=DEFAULT_SCAN_INTERVAL): int
         })
         return self.async_show_form(step_id='discover_broadcast', data_schema=schema, errors=errors)
 
+    async def async_step_discover_select(self, user_input=None):
+        """Выбор найденных устройств: все отмеченные добавляются за один шаг."""
+        errors = {}
+        if user_input is not None:
+            selected = [serial for serial in user_input.get('devices', []) if serial in self._discovered]
+            if not selected:
+                errors['base'] = 'no_devices_selected'
+            else:
+                first, *rest = selected
+                # Остальные устройства - отдельными потоками импорта,
+                # каждый создаст свою запись без участия пользователя
+                for serial in rest:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.flow.async_init(
+                            DOMAIN,
+                            context={'source': config_entries.SOURCE_IMPORT},
+                            data={
+                                'host': self._discovered[serial],
+                                'serial': serial,
+                                'scan_interval': self._scan_interval,
+                            },
+                        )
+                    )
+                return await self._async_create_device_entry(
+                    self._discovered[first], first, self._scan_interval
+                )
+
+        devices = {
+            serial: f'{host} (SN {serial})'
+            for serial, host in sorted(self._discovered.items(), key=lambda item: ipaddress.ip_address(item[1]))
+        }
+        schema = vol.Schema({
+            vol.Required('devices', default=list(devices)): cv.multi_select(devices),
+        })
+        return self.async_show_form(
+            step_id='discover_select',
+            data_schema=schema,
+            errors=errors,
+            description_placeholders={'count': str(len(devices))},
+        )
+
+    async def async_step_import(self, import_data):
+        """Добавление устройства, выбранного в общем списке поиска."""
+        return await self._async_create_device_entry(
+            import_data['host'],
+            import_data.get('serial'),
+            import_data.get('scan_interval', DEFAULT_SCAN_INTERVAL),
+        )
+
+    async def _async_create_device_entry(self, host: str, serial: str | None, scan_interval: int):
+        """Создать запись устройства; одно устройство (serial) - одна запись."""
+        if serial:
+            await self.async_set_unique_id(serial)
+            self._abort_if_unique_id_configured()
+            # Записи старых версий без unique_id
+            if self._serial_configured(serial):
+                return self.async_abort(reason='already_configured')
+        return self.async_create_entry(
+            title=f'Terneo {host}',
+            data={
+                'host': host,
+                'serial': serial,  # ← Сохраняем serial
+                'scan_interval': scan_interval
+            },
+            options={'scan_interval': scan_interval}
+        )
+
+    def _serial_configured(self, serial: str) -> bool:
+        return any(
+            entry.unique_id == serial or entry.data.get('serial') == serial
+            for entry in self._async_current_entries(include_ignore=False)
+        )
+
+    async def _async_default_subnet(self) -> str:
+        """Подсеть /24 адреса Home Assistant - предложение для опроса."""
+        try:
+            from homeassistant.components import network
+            source_ip = await network.async_get_source_ip(self.hass)
+        except Exception:
+            return ''
+        try:
+            return str(ipaddress.ip_network(f'{source_ip}/24', strict=False))
+        except ValueError:
+            return ''
+
     async def _async_test_connection(self, host: str) -> dict | None:
         """Проверяет подключение и возвращает данные устройства."""
-        api = TerneoApi(host)
+        # Своя очередь на время проверки: общая очередь устройства не создается
+        api = TerneoApi(host, session=async_get_session(self.hass))
         try:
-            tele = await api.get_telemetry()
+            tele = await api.get_telemetry(PRIORITY_USER)
             if tele is not None:
                 serial = tele.get("sn")
                 return {
@@ -88,26 +169,8 @@ class TerneoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return None
         except Exception:
             return None
-
-    async def _async_discover(self, port: int, timeout: int):
-        loop = asyncio.get_running_loop()
-        found = set()
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        try:
-            sock.bind(('', port))
-        except Exception:
-            return []
-        sock.setblocking(False)
-        end = loop.time() + timeout
-        while loop.time() < end:
-            try:
-                data, addr = await loop.sock_recvfrom(sock, 1024)
-                found.add(addr[0])
-            except Exception:
-                await asyncio.sleep(0.05)
-        sock.close()
-        return list(found)
+        finally:
+            api.channel.close()
 
     @staticmethod
     def async_get_options_flow(entry):
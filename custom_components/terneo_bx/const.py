@@ -1,7 +1,9 @@
 DOMAIN = "terneo_bx"
+CONF_SERIAL = "serial"  # серийный номер устройства в entry.data (он же unique_id)
 DEFAULT_SCAN_INTERVAL = 60
 DEFAULT_DELAY_MULTIPLIER = 1.5  # коэффициент задержки между запросами
 API_ENDPOINT = "/api.cgi"
+TEST_ENDPOINT = "/test.cgi"
 CMD_TELEMETRY = 4
 CMD_PARAMS = 1
 CMD_SET_PARAM = 1
@@ -11,10 +13,91 @@ LOGGER = None
 # Константы для энергетического сенсора
 ENERGY_UPDATE_INTERVAL_MAX = 3600  # Максимальный интервал обновления (1 час)
 ENERGY_MIN_INCREMENT = 0.001  # Минимальное значимое приращение энергии (кВт*ч)
+ENERGY_BUCKET_HOURS = 48  # сколько часовых корзин держать в памяти до выгрузки
+
+# Скважность реле
+DUTY_HISTORY_SIZE = 1024  # переключений в кольцевом буфере на устройство
+DUTY_WINDOWS = (3600, 86400)  # скользящие окна статистики (секунды)
+DUTY_MIN_COVERAGE = 0.25  # статистика окна - после того, как история покрыла эту долю окна
+
+# История телеметрии для websocket-запроса
+TELEMETRY_HISTORY_SIZE = 8640  # отсчетов на устройство (12 часов при опросе раз в 5 с)
+TELEMETRY_HISTORY_MAX_BUCKETS = 2000  # предел точек в одном ответе
+
+# Общий HTTP-пул для всех устройств
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_SESSION_UNSUB = f"{DOMAIN}_session_unsub"
+HTTP_LIMIT = 64  # всего соединений на весь парк
+HTTP_LIMIT_PER_HOST = 2  # контроллер термостата плохо держит параллельные соединения
+HTTP_DNS_CACHE_TTL = 300  # секунды
+HTTP_KEEPALIVE_TIMEOUT = 30  # секунды, покрывает все запросы одного опроса
+
+# Общий планировщик опроса
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+DEFAULT_MAX_CONCURRENT_POLLS = 4  # одновременных опросов на весь парк
+
+# UDP-рассылка устройств
+DATA_LISTENER = f"{DOMAIN}_listener"
+BROADCAST_PORT = 9000
+PUSH_SAFETY_INTERVAL = 300  # интервал страхующего HTTP опроса при живом UDP (секунды)
+PUSH_STALE_AFTER = 180  # UDP считается пропавшим после этой паузы (секунды)
+
+# Поиск устройств
+DEFAULT_DISCOVERY_TIMEOUT = 10  # секунды
+DISCOVERY_CONCURRENCY = 32  # одновременных запросов при опросе подсети
+DISCOVERY_PROBE_TIMEOUT = 1.5  # ожидание ответа одного адреса (секунды)
+DISCOVERY_QUIET_PERIOD = 2  # после опроса подсети ждем рассылок еще столько (секунды)
+DISCOVERY_MAX_HOSTS = 1024  # не больше /22
+LOCATE_INTERVAL = 900  # не чаще одного поиска сменившего адрес устройства в подсети (секунды)
+LOCATE_MAX_ATTEMPTS = 3  # после стольких неудачных поисков подряд подсеть больше не опрашивается
+ADDRESS_CONFIRM_INTERVAL = 60  # не чаще одной проверки нового адреса из рассылки (секунды)
+
+# Адаптивный опрос
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_MAX_SCAN_INTERVAL = 600  # потолок интервала в покое (секунды)
+ADAPTIVE_FAST_DIVISOR = 4  # у смены реле интервал = scan_interval / 4
+ADAPTIVE_TEMP_RATE = 0.2  # °C в минуту - "быстрое" изменение температуры
+ADAPTIVE_BACKOFF = 1.5  # рост интервала за каждый спокойный опрос
+
+# Очередь запросов к устройству
+DATA_CHANNELS = f"{DOMAIN}_channels"
+BACKGROUND_MAX_WAIT = 15  # фоновое чтение отбрасывается после такого ожидания (секунды)
+
+# Очередь записи параметров
+WRITE_DEBOUNCE = 0.3  # окно объединения записей (секунды)
+WRITE_MAX_DELAY = 1.5  # максимальная задержка первой записи в пачке (секунды)
+
+# Запись расписания (сервис set_schedule)
+SCHEDULE_DAYS_PER_REQUEST = 7  # дней в одном cmd=2 (чтение тоже отдает всю неделю)
+SCHEDULE_TEMP_MIN = 5  # °C
+SCHEDULE_TEMP_MAX = 45  # °C
+
+# Адаптивные таймауты запросов (секунды)
+TIMEOUT_CONNECT_MIN = 0.25
+TIMEOUT_CONNECT_MAX = 5.0
+TIMEOUT_READ_MIN = 0.5
+TIMEOUT_READ_MAX = 10.0  # прежний фиксированный таймаут; без отсчетов используется он
+TIMEOUT_DEVIATION_K = 4  # таймаут = srtt + k·rttvar
+TIMEOUT_MAX_BACKOFF = 8  # предел удвоения таймаута после таймаутов подряд
+MIN_MAX_TIMEOUT = 1  # границы опции max_timeout (потолок таймаута чтения)
+MAX_MAX_TIMEOUT = 30
+
+# Автоматический выключатель запросов к недоступному устройству
+BREAKER_FAILURE_THRESHOLD = 3  # ошибок подряд до размыкания
+BREAKER_BACKOFF_MIN = 15  # первая пауза перед пробой (секунды)
+BREAKER_BACKOFF_MAX = 600  # предел паузы (секунды)
+BREAKER_JITTER = 0.2  # разброс паузы ±20%
+BREAKER_PROBE_TIMEOUT = 30  # проба без результата дольше этого считается потерянной (секунды)
+
+# Гистограммы задержек запросов
+LATENCY_BUCKETS_MS = (10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500, 10000)
+METRICS_WINDOW = 3600  # окно перцентилей (секунды)
+METRICS_SLICES = 12  # частей окна; старейшая обнуляется при сдвиге
 
 # Минимальные и максимальные значения для настроек
 MIN_SCAN_INTERVAL = 5
 MAX_SCAN_INTERVAL = 300
+MAX_ADAPTIVE_SCAN_INTERVAL = 3600
 MIN_DELAY_MULTIPLIER = 0.5
 MAX_DELAY_MULTIPLIER = 5.0
 
@@ -1,30 +1,130 @@
+from collections import Counter
 from datetime import timedelta
-import logging, asyncio
+import ipaddress, logging, asyncio, time
 
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .write_queue import TerneoWriteQueue
+from .schedule import ScheduleIndex, TerneoScheduleTracker, schedule_diff
+from .energy import TerneoEnergyAccumulator
+from .statistics import TerneoStatisticsExporter
+from .duty import TerneoDutyCycleTracker
+from .history import TerneoTelemetryHistory
+from .scheduler import async_get_scheduler
+from .api import CannotConnect
+from .session import async_move_api
+from .discovery import async_locate, async_probe_serial
+from .channel import RequestDropped
+from .decoder import DECODER, DecodeError
+from .snapshot import FIELDS, TerneoSnapshot, freeze_schedule, EMPTY
+from .const import (
+    PARAM_TYPES,
+    PUSH_SAFETY_INTERVAL,
+    PUSH_STALE_AFTER,
+    LOCATE_INTERVAL,
+    LOCATE_MAX_ATTEMPTS,
+    ADDRESS_CONFIRM_INTERVAL,
+    SCHEDULE_DAYS_PER_REQUEST,
+    MIN_SCAN_INTERVAL,
+    ADAPTIVE_FAST_DIVISOR,
+    ADAPTIVE_TEMP_RATE,
+    ADAPTIVE_BACKOFF,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
  
 class TerneoCoordinator(DataUpdateCoordinator):
     """Coordinator for Terneo BX."""
 
-    def __init__(self, hass, api, update_interval, serial, host, delay_multiplier=1.5):
+    def __init__(self, hass, api, update_interval, serial, host, delay_multiplier=1.5,
+                 adaptive_polling=False, max_interval=None):
         super().__init__(
             hass,
             _LOGGER,
             name="Terneo BX Coordinator",
-            update_interval=update_interval,
+            # Собственного таймера нет - опросом управляет TerneoFleetScheduler
+            update_interval=None,
         )
         self.api = api
         self.serial = serial
         self.host = host
+        self.poll_interval = update_interval
+
+        # Отставание опроса от запланированного времени (секунды)
+        self.schedule_slip = None
+        self.max_schedule_slip = 0.0
+
+        # Последние данные, о которых оповещены сущности (для поиска изменений)
+        self._notified_data = None
+        self._notified_success = None
+
+        # Время последней телеметрии, полученной по UDP (monotonic)
+        self._last_push = None
+        self._push_timer = None  # проверка пропажи UDP (отмена async_call_later)
+
+        # Поиск устройства в подсети, если оно пропало со своего адреса
+        self._located_at = None  # monotonic последнего поиска
+        self._locating = False
+        self._locate_failures = 0  # неудачных поисков подряд
+        # Адрес из рассылки проверяется запросом перед переключением
+        self._confirming = False
+        self._address_checked: tuple[str, float] | None = None  # (адрес, monotonic проверки)
+
+        # Адаптивный опрос: интервал между min_interval и max_interval
+        self._adaptive = adaptive_polling
+        self._max_interval = max(update_interval, max_interval or update_interval)
+        self._min_interval = max(
+            timedelta(seconds=MIN_SCAN_INTERVAL),
+            update_interval / ADAPTIVE_FAST_DIVISOR,
+        )
+        self._adaptive_interval = update_interval
+        self._last_sample = None  # (monotonic, temp_air, temp_floor, power)
           
         # Кэш для редко меняющихся данных
         self._cached_schedule = {}
         self._cached_time = {}
+        self._schedule = EMPTY  # неизменяемая копия _cached_schedule для снимков
+        self._schedule_index = None  # (расписание, ScheduleIndex) - индекс текущего расписания
+
+        # Последние сырые ответы (fallback при ошибке, UDP-push, оптимистичная запись)
+        self._last_par = None
+        self._last_telemetry = None
+        self._decode_cache = {}  # последний разобранный par (см. TerneoDecoder.decode)
         self._schedule_update_counter = 5
         self._time_update_counter = 20   
+        self._schedule_fetched_at = None  # monotonic последнего чтения расписания
+        self._schedule_lock = asyncio.Lock()  # сравнение и запись расписания - атомарно
+        self._time_fetched_at = None
+
+        # Диагностика опроса: длительности фаз последнего опроса (мс) и счетчики
+        self.phase_timings: dict[str, float] = {}
+        self.poll_counters = Counter()
+
+        # Объединение записей параметров от разных сущностей
+        self.writer = TerneoWriteQueue(self)
+
+        # Локальные изменения параметров (оптимистичная запись, откат, чтение
+        # после записи): сквозной номер и номер последнего изменения каждого id.
+        # Опрос, начавший чтение раньше, не затирает их своими данными
+        self._params_seq = 0
+        self._params_touched: dict[int, int] = {}
+
+        # Счетчик энергии, питается каждым новым снимком
+        self.energy = TerneoEnergyAccumulator(host)
+        self.statistics = TerneoStatisticsExporter(hass, self)
+
+        # История переключений реле для скважности
+        self.duty = TerneoDutyCycleTracker()
+
+        # Телеметрия высокого разрешения (websocket terneo_bx/telemetry_history)
+        self.history = TerneoTelemetryHistory()
+        self._applying = False  # идет локальное изменение снимка (не опрос)
+
+        # Текущий период расписания и таймер следующего перехода
+        self.schedule_tracker = TerneoScheduleTracker(hass, self)
 
         self._min_delay = 0.2   # минимальная задержка в секундах
         self._max_delay = 5.0   # максимальная задержка
@@ -33,11 +133,29 @@ class TerneoCoordinator(DataUpdateCoordinator):
  
     async def _async_update_data(self):
         """Fetch full Terneo state."""
-        
-        # Сохраняем предыдущие данные для fallback
-        previous_data = self.data if self.data else {}
+        phases = {}
+        started = mark = time.monotonic()
+
+        # 0) Устройство недоступно - не тратим запросы, пока не подошло время пробы
+        probed = None
+        breaker = self.api.breaker
+        if breaker.is_open:
+            if not breaker.probe_due:
+                self.poll_counters["breaker_skipped"] += 1
+                raise UpdateFailed(
+                    f"Device {self.host} unavailable, next attempt in {breaker.retry_in:.0f}s"
+                )
+            try:
+                probed = await self.api.async_probe()
+            except CannotConnect as e:
+                self._async_maybe_locate()
+                raise UpdateFailed(f"Device {self.host} still unavailable: {e}") from e
+            # Устройство снова отвечает по старому адресу
+            self._locate_failures = 0
+            mark = self._phase_done(phases, "probe", mark)
 
         # 1) Параметры (критичные данные)
+        read_seq = self._params_seq
         try:
             params = await self.api.get_params()
             par = params.get("par")
@@ -45,14 +163,18 @@ class TerneoCoordinator(DataUpdateCoordinator):
                 raise UpdateFailed("Invalid params payload - not a list")
         except Exception as e:
             _LOGGER.error(f"Failed to read params: {e}")
+            self._check_breaker(e)
             # Если есть предыдущие данные, используем их
-            if previous_data.get("raw", {}).get("params"):
+            if self._last_par:
                 _LOGGER.warning("Using previous params data")
-                par = previous_data["raw"]["params"].get("par", [])
+                par = self._last_par
+                self.poll_counters["params_fallback"] += 1
             else:
                 raise UpdateFailed(f"Failed to read params and no cached data: {e}")
+        mark = self._phase_done(phases, "params", mark)
 
         await asyncio.sleep(self.calc_delay())
+        mark = self._phase_done(phases, "delay", mark)
   
         # 2) Время (некритичные данные)
         if self._time_update_counter >= 20:        
@@ -60,35 +182,46 @@ class TerneoCoordinator(DataUpdateCoordinator):
                 time_data = await self.api.get_time()
                 if time_data:
                     self._cached_time = time_data
+                    self._time_fetched_at = time.monotonic()
                     self._time_update_counter = 0
                 else:
                     _LOGGER.warning("Empty time data received, keeping cache")
+            except RequestDropped as e:
+                _LOGGER.debug(f"Time read skipped: {e}")
+                self.poll_counters["time_dropped"] += 1
             except Exception as e:
                 _LOGGER.error(f"Failed to read time: {e}")
+                self._check_breaker(e)
+                self.poll_counters["time_errors"] += 1
             finally:
                 self._time_update_counter = 0
+            mark = self._phase_done(phases, "time", mark)
             await asyncio.sleep(self.calc_delay())               
+            mark = self._phase_done(phases, "delay", mark)
         else:
             self._time_update_counter += 1
-        
-        # Используем кэшированное значение
-        time_data = self._cached_time
+
 
         # 3) Телеметрия (критичные данные)
         try:
-            telemetry = await self.api.get_telemetry()
+            # После успешной пробы телеметрия уже получена
+            telemetry = probed or await self.api.get_telemetry()
             if not telemetry:
                 raise UpdateFailed("Empty telemetry data")
         except Exception as e:
             _LOGGER.error(f"Failed to read telemetry: {e}")
+            self._check_breaker(e)
             # Пробуем использовать предыдущие данные
-            if previous_data.get("raw", {}).get("telemetry"):
+            if self._last_telemetry:
                 _LOGGER.warning("Using previous telemetry data")
-                telemetry = previous_data["raw"]["telemetry"]
+                telemetry = self._last_telemetry
+                self.poll_counters["telemetry_fallback"] += 1
             else:
                 raise UpdateFailed(f"Failed to read telemetry and no cached data: {e}")
+        mark = self._phase_done(phases, "telemetry", mark)
         
         await asyncio.sleep(self.calc_delay())
+        mark = self._phase_done(phases, "delay", mark)
 
         # 4) Расписание (некритичные данные)
         if self._schedule_update_counter >= 5: 
@@ -96,137 +229,531 @@ class TerneoCoordinator(DataUpdateCoordinator):
                 schedule = await self.api.get_schedule()
                 tt = schedule.get("tt")
                 if isinstance(tt, dict) and tt:
-                    self._cached_schedule = tt
+                    if tt != self._cached_schedule:
+                        self._cached_schedule = tt
+                        self._schedule = freeze_schedule(tt)
+                    self._schedule_fetched_at = time.monotonic()
                     self._schedule_update_counter = 0
                 else:
                     _LOGGER.warning("Invalid schedule data, keeping cache")
+            except RequestDropped as e:
+                _LOGGER.debug(f"Schedule read skipped: {e}")
+                self.poll_counters["schedule_dropped"] += 1
             except Exception as e:
                 _LOGGER.error(f"Failed to read schedule: {e}")
+                self._check_breaker(e)
+                self.poll_counters["schedule_errors"] += 1
             finally:
                 self._schedule_update_counter = 0
+            mark = self._phase_done(phases, "schedule", mark)
         else:
             self._schedule_update_counter += 1
         
-        # Используем кэшированное расписание
-        tt = self._cached_schedule
+        # Время и расписание берутся из кэша
+        data = self._build_data(self._merge_local_params(par, read_seq), telemetry)
+        self._params_touched = {pid: seq for pid, seq in self._params_touched.items() if seq > read_seq}
+        if self._adaptive:
+            self._adapt_interval(data)
+        self._phase_done(phases, "build", mark)
+
+        phases["total"] = round((time.monotonic() - started) * 1000, 2)
+        self.phase_timings = phases
+        self.poll_counters["polls"] += 1
+        return data
+
+    def _merge_local_params(self, par: list, read_seq: int) -> list:
+        """Параметры опроса с локальными изменениями, сделанными после начала его чтения."""
+        if self._params_seq == read_seq:
+            return par
+        newer = {pid for pid, seq in self._params_touched.items() if seq > read_seq}
+        local = {
+            item[0]: item for item in self._last_par or ()
+            if len(item) >= 3 and item[0] in newer
+        }
+        merged = []
+        for item in par:
+            pid = item[0] if item else None
+            if pid in newer:
+                # Значение устройства прочитано до записи - берем локальное
+                if pid in local:
+                    merged.append(local.pop(pid))
+                continue
+            merged.append(item)
+        merged.extend(local.values())
+        self.poll_counters["params_merged"] += 1
+        return merged
 
-        # Преобразуем структуру Terneo BX → нормальная
+    def _touch_params(self, param_ids) -> None:
+        self._params_seq += 1
+        for pid in param_ids:
+            self._params_touched[pid] = self._params_seq
+
+    def _check_breaker(self, error: Exception) -> None:
+        """Цепь разомкнулась - остальные фазы опроса не выполняются."""
+        if self.api.breaker.is_open:
+            self.poll_counters["breaker_aborted"] += 1
+            self._async_maybe_locate()
+            raise UpdateFailed(
+                f"Device {self.host} unavailable after {self.api.breaker.failures} failures: {error}"
+            ) from error
+
+    @callback
+    def _async_maybe_locate(self) -> None:
+        """Устройство недоступно и рассылки от него нет - поискать его по serial в подсети.
+
+        Пауза между поисками удваивается после каждой неудачи; после
+        LOCATE_MAX_ATTEMPTS неудач подряд подсеть больше не опрашивается,
+        пока устройство не ответит само.
+        """
+        if not self.serial or self._locating or self.push_active:
+            return
+        if self._locate_failures >= LOCATE_MAX_ATTEMPTS:
+            return
+        now = time.monotonic()
+        interval = LOCATE_INTERVAL * 2 ** self._locate_failures
+        if self._located_at is not None and now - self._located_at < interval:
+            return
+        self._located_at = now
+        self._locating = True
+        self.hass.async_create_background_task(self._async_locate(), f"terneo_bx locate {self.host}")
+
+    async def _async_locate(self) -> None:
         try:
-            # Температура воздуха (t.0) - делим на 16 для получения градусов
-            temp_air_raw = telemetry.get("t.0")
-            temp_air = round((int(temp_air_raw) / 16), 2) if temp_air_raw is not None else None
-            
-            # Температура пола (t.1) - делим на 16
-            temp_floor_raw = telemetry.get("t.1")
-            temp_floor = round((int(temp_floor_raw) / 16), 2) if temp_floor_raw is not None else None
-            
-            # Дополнительный датчик температуры (t.5)
-            temp_external_raw = telemetry.get("t.5")
-            temp_external = round((int(temp_external_raw) / 16), 2) if temp_external_raw is not None else None
-            
-            # Статус реле (f.0) - любое значение > 0 означает включено
-            raw_pwr = telemetry.get("f.0")
-            power = int(raw_pwr) if raw_pwr is not None else 0
-
-            # Уровень сигнала WiFi (o.0)
-            wifi_rssi_raw = telemetry.get("o.0")
-            wifi_rssi = int(wifi_rssi_raw) if wifi_rssi_raw is not None else None
-
-        except (ValueError, TypeError) as e:
-            _LOGGER.error(f"Invalid telemetry payload: {e}")
-            raise UpdateFailed(f"Invalid telemetry payload: {e}")
- 
-        # Разбор параметров - создаем словарь {id: value}
-        params_dict = {}
+            address = await async_locate(self.hass, self.serial, self.api.host)
+        finally:
+            self._locating = False
+        if address is None:
+            self._locate_failures += 1
+            if self._locate_failures >= LOCATE_MAX_ATTEMPTS:
+                _LOGGER.warning(
+                    "Device %s (SN %s) not found in the subnet after %d attempts, giving up",
+                    self.host, self.serial, self._locate_failures,
+                )
+            return
+        # Адрес уже подтвержден ответом с нужным sn
+        self._async_move(address)
+
+    @callback
+    def async_handle_address(self, address: str) -> None:
+        """Рассылка с известным sn пришла с нового адреса (DHCP).
+
+        Serial в рассылке ничем не защищен, поэтому адрес сначала
+        проверяется запросом cmd=4: переключение только если по нему
+        отвечает это же устройство.
+        """
+        if address == self.api.host or self._confirming:
+            return
         try:
-            for item in par:
-                if len(item) >= 3:
-                    param_id = item[0]
-                    param_value = item[2]
-                    params_dict[param_id] = param_value
-            
-            # Проверяем наличие критичных параметров
-            if not params_dict:
-                raise ValueError("Empty params_dict")
-            
-            # ID=31: setTemperature - температура уставки текущего режима
-            target_temp_raw = params_dict.get(31)
-            target_temp = int(target_temp_raw) if target_temp_raw is not None else None
-            
-            # ID=2: mode - режим работы (0=расписание, 1=ручной)
-            mode_raw = params_dict.get(2)
-            mode = int(mode_raw) if mode_raw is not None else 0
-            
-            # ID=3: controlType - режим контроля (0=по полу, 1=по воздуху, 2=расширенный)
-            control_type_raw = params_dict.get(3)
-            control_type = int(control_type_raw) if control_type_raw is not None else None
-            
-            # ID=4: manualAir - уставка ручного режима по воздуху
-            manual_air_raw = params_dict.get(4)
-            manual_air = int(manual_air_raw) if manual_air_raw is not None else None
-            
-            # ID=5: manualFloorTemperature - уставка ручного режима по полу
-            manual_floor_raw = params_dict.get(5)
-            manual_floor = int(manual_floor_raw) if manual_floor_raw is not None else None
-            
-            # ID=17: power - нагрузка
-            power_w_raw = params_dict.get(17)
-            if power_w_raw is not None:
-                power_w_int = int(power_w_raw)
-                if power_w_int <= 150:                
-                    power_w = power_w_int * 10 
-                else:
-                    power_w = 1500 + (power_w_int * 20)
-            else: 
-                power_w = None    
-
-            # ID=19: histeresis - гистерезис в 1/10 °C
-            histeresis_raw = params_dict.get(19)
-            histeresis = int(histeresis_raw) / 10 if histeresis_raw is not None else None
-            
-            # ID=125: powerOff - выключение устройства
-            power_off_raw = params_dict.get(125)
-            power_off = int(power_off_raw) if power_off_raw is not None else 0
-            
-            # ID=118: coolingControlWay - режим нагрев(0) или охлаждение(1)
-            hvac_mode_raw = params_dict.get(118)
-            hvac_mode = int(hvac_mode_raw) if hvac_mode_raw is not None else 0
-
-            # ID=23: brightness - яркость экрана (0-9)
-            brightness_raw = params_dict.get(23)
-            brightness = int(brightness_raw) if brightness_raw is not None else None
-
-        except (ValueError, TypeError, KeyError) as e:
-            _LOGGER.error(f"Params parsing error: {e}")
-            raise UpdateFailed(f"Params parsing error: {e}")
- 
-        # Итоговые данные
+            ipaddress.ip_address(self.api.host)
+        except ValueError:
+            # Задано имя хоста - адрес отслеживает DNS
+            return
+        now = time.monotonic()
+        if self._address_checked is not None:
+            checked, at = self._address_checked
+            if checked == address and now - at < ADDRESS_CONFIRM_INTERVAL:
+                return
+        self._address_checked = (address, now)
+        self._confirming = True
+        self.hass.async_create_background_task(
+            self._async_confirm_address(address), f"terneo_bx confirm address {self.host}"
+        )
+
+    async def _async_confirm_address(self, address: str) -> None:
+        try:
+            serial = await async_probe_serial(self.hass, address)
+        finally:
+            self._confirming = False
+        if serial != str(self.serial):
+            _LOGGER.debug(
+                "Ignoring address %s for %s: device there reported SN %s", address, self.host, serial
+            )
+            return
+        self._async_move(address)
+
+    @callback
+    def _async_move(self, address: str) -> None:
+        """Переключиться на новый адрес без перезагрузки записи."""
+        if address == self.api.host:
+            return
+        _LOGGER.warning(
+            "Device %s (SN %s) moved from %s to %s", self.host, self.serial, self.api.host, address
+        )
+        async_move_api(self.hass, self.api, address)
+        self._locate_failures = 0
+        self.poll_counters["address_changes"] += 1
+        # Адрес сохраняется в data записи; async_reload_entry перезагружает
+        # запись только при смене options
+        entry = self.config_entry
+        if entry is not None and entry.data.get("address") != address:
+            self.hass.config_entries.async_update_entry(entry, data={**entry.data, "address": address})
+        if not self.last_update_success:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @staticmethod
+    def _phase_done(phases: dict, name: str, mark: float) -> float:
+        """Добавить длительность фазы (мс) и вернуть новую отметку времени."""
+        now = time.monotonic()
+        phases[name] = round(phases.get(name, 0.0) + (now - mark) * 1000, 2)
+        return now
+
+    def _build_data(self, par, telemetry) -> TerneoSnapshot:
+        """Преобразовать структуру Terneo BX → снимок (см. decoder.py)."""
+        try:
+            fields = DECODER.decode(par, telemetry, self._decode_cache)
+        except DecodeError as e:
+            _LOGGER.error(f"Invalid device payload: {e}")
+            raise UpdateFailed(f"Invalid device payload: {e}")
+
+        # Проверяем наличие критичных параметров
+        if not fields["params"]:
+            _LOGGER.error("Params parsing error: Empty params")
+            raise UpdateFailed("Params parsing error: Empty params")
+
+        self._last_par = par
+        self._last_telemetry = telemetry
+        return TerneoSnapshot.build(
+            fields,
+            self._schedule,
+            self._cached_time.get("time") if self._cached_time else None,
+            self.data,
+        )
+
+    @callback
+    def async_apply_params(self, params: dict) -> dict:
+        """Применить значения параметров к текущим данным без запроса.
+
+        Возвращает прежние значения этих параметров (для отката).
+        Значение None удаляет параметр.
+        """
+        if not self.data or not self._last_par:
+            return {}
+        par = [list(item) for item in self._last_par]
+        index = {item[0]: item for item in par if len(item) >= 3}
+        previous = {}
+        for param_id, value in params.items():
+            item = index.get(param_id)
+            previous[param_id] = item[2] if item is not None else None
+            if value is None:
+                if item is not None:
+                    par.remove(item)
+            elif item is not None:
+                item[2] = str(value)
+            else:
+                par.append([param_id, PARAM_TYPES.get(param_id, 2), str(value)])
+
+        try:
+            data = self._build_data(par, self._last_telemetry or {})
+        except UpdateFailed as e:
+            _LOGGER.debug(f"Cannot apply {params} to {self.host}: {e}")
+            return {}
+        self._touch_params(params)
+        self._async_publish_local(data)
+        return previous
+
+    @callback
+    def async_rollback_params(self, rollback: dict, written: dict) -> None:
+        """Откатить неудавшуюся запись.
+
+        Откатываются только параметры, которые еще показывают записанное
+        значение: более поздняя запись того же id остается.
+        """
+        current = {item[0]: item[2] for item in self._last_par or () if len(item) >= 3}
+        restore = {
+            pid: value for pid, value in rollback.items()
+            if pid in written and current.get(pid) == (None if written[pid] is None else str(written[pid]))
+        }
+        if restore:
+            self.async_apply_params(restore)
+
+    @callback
+    def _async_publish_local(self, data: TerneoSnapshot) -> None:
+        """Показать локально измененный снимок без опроса.
+
+        В отличие от async_set_updated_data last_update_success не меняется:
+        запись на недоступное устройство не делает сущности доступными.
+        """
+        self.data = data
+        self._applying = True
+        try:
+            self.async_update_listeners()
+        finally:
+            self._applying = False
+
+    @callback
+    def async_apply_readback(self, par: list, pending: dict | None = None) -> None:
+        """Параметры, прочитанные после записи, - новая база снимков и следующих записей.
+
+        pending - значения, поставленные в очередь после этой записи: они
+        остаются поверх прочитанных (оптимистично).
+        """
+        if not self.data:
+            return
+        try:
+            data = self._build_data(par, self._last_telemetry or {})
+        except UpdateFailed as e:
+            _LOGGER.debug(f"Ignoring params readback from {self.host}: {e}")
+            return
+        self._touch_params(item[0] for item in par if len(item) >= 3)
+        self._async_publish_local(data)
+        if pending:
+            self.async_apply_params(pending)
+
+    async def async_set_schedule(self, week: dict[str, list]) -> int:
+        """Записать расписание: только изменившиеся дни, минимумом запросов cmd=2.
+
+        week - нормализованные дни {"0".."6": [[минута, °C×10], ...]} (см.
+        schedule.parse_week); дни, которых нет в week, не меняются.
+        Возвращает число отправленных запросов (0 - расписание уже такое).
+        """
+        limit = self.data.max_schedule_period if self.data is not None else None
+        if limit:
+            for day, periods in week.items():
+                if len(periods) > limit:
+                    raise ValueError(
+                        f"Day {day} has {len(periods)} periods, device allows {limit}"
+                    )
+
+        async with self._schedule_lock:
+            changed = schedule_diff(self._cached_schedule, week)
+            if not changed:
+                self.poll_counters["schedule_writes_skipped"] += 1
+                return 0
+            days = sorted(changed)
+            requests = 0
+            for start in range(0, len(days), SCHEDULE_DAYS_PER_REQUEST):
+                chunk = {day: changed[day] for day in days[start:start + SCHEDULE_DAYS_PER_REQUEST]}
+                await self.api.set_schedule_days(chunk)
+                requests += 1
+                # Кэш обновляется на месте - перечитывать расписание не нужно
+                self._async_apply_schedule(chunk)
+            self.poll_counters["schedule_writes"] += requests
+            _LOGGER.debug("Wrote schedule days %s to %s in %d request(s)", days, self.host, requests)
+            return requests
+
+    @callback
+    def _async_apply_schedule(self, days: dict[str, list]) -> None:
+        """Внести записанные дни в кэш расписания и текущий снимок."""
+        self._cached_schedule.update(days)
+        self._schedule = freeze_schedule(self._cached_schedule)
+        self._schedule_fetched_at = time.monotonic()
+        if self.data is None:
+            return
+        self._async_publish_local(self.data.replace(schedule=self._schedule))
+
+    @property
+    def schedule_index(self) -> ScheduleIndex | None:
+        """Индекс расписания текущего снимка.
+
+        Строится один раз на каждое новое расписание: неизменившееся
+        расписание переходит в новый снимок тем же объектом.
+        """
+        schedule = self.data.schedule if self.data is not None else None
+        if not schedule:
+            return None
+        if self._schedule_index is None or self._schedule_index[0] is not schedule:
+            self._schedule_index = (schedule, ScheduleIndex(schedule))
+        return self._schedule_index[1]
+
+    async def async_write_parameters(self, params: dict):
+        """Записать параметры через общую очередь устройства."""
+        await self.writer.async_write(params)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Оповестить только сущности, чьи входные данные изменились.
+
+        Контекст сущности (CoordinatorEntity context) - набор полей снимка,
+        от которых она зависит: "temp_floor" или ("params", 124). Сущности
+        без контекста обновляются всегда, как и все сущности при смене
+        доступности координатора.
+        """
+        old, new = self._notified_data, self.data
+        changed = new.diff(old) if old is not None and new is not None else None
+        status_changed = self._notified_success != self.last_update_success
+        self._notified_data = self.data
+        self._notified_success = self.last_update_success
+
+        if self.last_update_success and new is not None:
+            # Реле держит состояние до следующего снимка; момент переключения
+            # оценивает трекер скважности, энергия делится по нему же
+            now = time.time()
+            self.duty.update(1 if new.power == 1 else 0, now)
+            self.energy.update((new.power_w or 0) if new.power == 1 else 0, now, self.duty.changed_at)
+            if not self._applying:
+                # Оптимистичная запись параметров - не новый отсчет телеметрии
+                self.history.append(new)
+            if self.energy.has_closed_hours:
+                self.statistics.async_schedule_flush()
+
+        for update_callback, context in list(self._listeners.values()):
+            if status_changed or changed is None or context is None or not changed.isdisjoint(context):
+                update_callback()
+
+    @callback
+    def async_handle_push(self, telemetry: dict):
+        """Применить телеметрию из UDP-рассылки устройства."""
+        if not self.data or self._last_telemetry is None:
+            return
+        merged = {**self._last_telemetry, **telemetry}
+        if merged == self._last_telemetry:
+            self._async_mark_push()
+            return
+        try:
+            data = self._build_data(self._last_par, merged)
+        except UpdateFailed as e:
+            _LOGGER.debug(f"Ignoring push from {self.host}: {e}")
+            return
+        self._async_mark_push()
+        self.async_set_updated_data(data)
+
+    @callback
+    def _async_mark_push(self) -> None:
+        """Отметить рассылку; с ее началом интервал опроса растет, с пропажей - сокращается."""
+        started = not self.push_active
+        self._last_push = time.monotonic()
+        if self._push_timer is None:
+            self._push_timer = async_call_later(self.hass, PUSH_STALE_AFTER, self._async_check_push)
+        if started:
+            self._async_reschedule()
+
+    @callback
+    def _async_check_push(self, _now) -> None:
+        """Таймер пропажи UDP: пока рассылки идут - перевзводится на остаток."""
+        self._push_timer = None
+        if self.push_active:
+            remaining = PUSH_STALE_AFTER - (time.monotonic() - self._last_push)
+            self._push_timer = async_call_later(self.hass, remaining, self._async_check_push)
+            return
+        _LOGGER.debug("Broadcasts from %s stopped, back to regular polling", self.host)
+        self._async_reschedule()
+
+    @callback
+    def _async_reschedule(self) -> None:
+        """Интервал изменился - пересчитать уже назначенный слот опроса."""
+        async_get_scheduler(self.hass).async_reschedule(self.host)
+
+    async def async_shutdown(self) -> None:
+        if self._push_timer is not None:
+            self._push_timer()
+            self._push_timer = None
+        await super().async_shutdown()
+
+    @property
+    def push_active(self) -> bool:
+        """Устройство недавно присылало телеметрию по UDP."""
+        return (
+            self._last_push is not None
+            and time.monotonic() - self._last_push < PUSH_STALE_AFTER
+        )
+
+    def _adapt_interval(self, data):
+        """Подобрать интервал следующего опроса по состоянию устройства.
+
+        Смена реле или быстрое изменение температуры - опрашиваем часто;
+        устройство выключено или в покое - интервал плавно растет до потолка.
+        """
+        now = time.monotonic()
+        sample = (now, data.temp_air, data.temp_floor, data.power)
+        previous, self._last_sample = self._last_sample, sample
+
+        if data.power_off == 1:
+            self._adaptive_interval = self._max_interval
+            return
+
+        if previous is not None:
+            relay_changed = previous[3] != sample[3]
+            minutes = (now - previous[0]) / 60
+            fast = False
+            if minutes > 0:
+                for old, new in zip(previous[1:3], sample[1:3]):
+                    if old is not None and new is not None and abs(new - old) / minutes >= ADAPTIVE_TEMP_RATE:
+                        fast = True
+                        break
+            if relay_changed or fast:
+                self._adaptive_interval = self._min_interval
+                return
+
+        self._adaptive_interval = min(
+            self._max_interval,
+            self._adaptive_interval * ADAPTIVE_BACKOFF,
+        )
+
+    async def async_refresh(self) -> None:
+        """Обновить данные; сменившийся интервал применяется к следующему слоту.
+
+        Плановый опрос держит слот устройства, и планировщик сам берет
+        current_interval() после его окончания. Для внеплановых обновлений
+        (после записи, смены адреса) слот пересчитывается здесь.
+        """
+        previous = self.current_interval()
+        await super().async_refresh()
+        if self.current_interval() != previous:
+            self._async_reschedule()
+
+    def current_interval(self) -> timedelta:
+        """Интервал до следующего опроса для планировщика."""
+        interval = self._adaptive_interval if self._adaptive else self.poll_interval
+        if self.push_active:
+            # Телеметрия приходит по UDP - HTTP опрос только страхует
+            return max(interval, timedelta(seconds=PUSH_SAFETY_INTERVAL))
+        return interval
+
+    def diagnostics(self) -> dict:
+        """Состояние опроса, кэшей, очереди записи и последние ответы (без редактирования)."""
+        def age(monotonic_at):
+            return round(time.monotonic() - monotonic_at, 1) if monotonic_at is not None else None
+
+        data = self.data
+        writer = self.writer
         return {
-            "temp_air": temp_air,
-            "temp_floor": temp_floor,
-            "temp_external": temp_external,
-            "power": power,
-            "power_w": power_w,
-            "target_temp": target_temp,
-            "mode": mode,
-            "control_type": control_type,
-            "manual_air": manual_air,
-            "manual_floor": manual_floor,
-            "histeresis": histeresis,
-            "power_off": power_off,
-            "hvac_mode": hvac_mode,
-            "wifi_rssi": wifi_rssi,
-            "schedule": tt,
-            "tt": tt,
-            "time": time_data.get("time") if time_data else None,
-            "params_dict": params_dict,
-            "brightness": brightness,
-            "raw": {
-                "params": {"par": par},
-                "telemetry": telemetry,
+            "coordinator": {
+                "last_update_success": self.last_update_success,
+                "last_exception": str(self.last_exception) if self.last_exception else None,
+                "poll_interval": self.poll_interval.total_seconds(),
+                "current_interval": self.current_interval().total_seconds(),
+                "adaptive": self._adaptive,
+                "push_active": self.push_active,
+                "schedule_slip": self.schedule_slip,
+                "max_schedule_slip": self.max_schedule_slip,
+                "calc_delay": self.calc_delay(),
+                "phase_timings_ms": self.phase_timings,
+                "counters": dict(self.poll_counters),
+            },
+            "cache": {
+                "schedule_age": age(self._schedule_fetched_at),
+                "schedule_update_counter": self._schedule_update_counter,
+                "schedule_days": len(self._cached_schedule or {}),
+                "time_age": age(self._time_fetched_at),
+                "time_update_counter": self._time_update_counter,
+            },
+            "writer": {
+                "pending": writer.pending,
+                "writes": writer.writes,
+                "merged": writer.merged,
+                "mismatches": writer.mismatches,
+                "rollbacks": writer.rollbacks,
+            },
+            "history": {
+                "telemetry_samples": len(self.history),
+                "relay_transitions": len(self.duty),
+                "energy_buckets": len(self.energy.buckets),
+                "statistics_hours_imported": self.statistics.flushed_hours,
+            },
+            "data": {name: getattr(data, name) for name in FIELDS} if data is not None else None,
+            "payloads": {
+                "params": self._last_par,
+                "telemetry": self._last_telemetry,
+                "schedule": self._cached_schedule,
+                "time": self._cached_time,
             },
         }
 
+    def record_schedule_slip(self, slip: float):
+        """Запомнить отставание очередного опроса от расписания."""
+        self.schedule_slip = slip
+        self.max_schedule_slip = max(self.max_schedule_slip, slip)
+
     def calc_delay(self):
         dur = self.api.last_request_duration
         if not dur:
@@ -0,0 +1,263 @@
+"""Табличный декодер параметров и телеметрии Terneo BX.
+
+Описание каждого поля (имя, тип, масштаб, единицы, знак, функция
+разбора) задается один раз в PARAM_SPECS / TELEMETRY_SPECS и
+компилируется в TerneoDecoder, который разбирает ответ за один проход.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable
+
+from .const import PARAM_TYPES
+
+_LOGGER = logging.getLogger(__name__)
+
+# Типы данных параметров (см. const.PARAM_TYPES)
+TYPE_INT8 = 1
+TYPE_UINT8 = 2
+TYPE_INT16 = 3
+TYPE_UINT16 = 4
+TYPE_UINT32 = 6
+TYPE_BOOL = 7
+
+_SIGNED_BITS = {TYPE_INT8: 8, TYPE_INT16: 16}
+
+
+def decode_power(raw) -> int:
+    """ID=17: мощность нагрузки в кодировке Terneo → ватты."""
+    value = int(raw)
+    if value <= 150:
+        return value * 10
+    return 1500 + value * 20
+
+
+class FieldSpec:
+    """Описание одного поля параметров или телеметрии."""
+
+    __slots__ = ("name", "type", "scale", "unit", "signed", "decode", "digits", "strict")
+
+    def __init__(
+        self,
+        name: str,
+        type: int | None = None,
+        scale: float = 1,
+        unit: str | None = None,
+        signed: bool | None = None,
+        decode: Callable[[Any], Any] | None = None,
+        digits: int | None = None,
+        strict: bool = False,
+    ):
+        self.name = name
+        self.type = type
+        self.scale = scale
+        self.unit = unit
+        self.signed = signed if signed is not None else type in _SIGNED_BITS
+        self.decode = decode
+        self.digits = digits
+        # strict - ошибка разбора поля считается ошибкой всего ответа
+        self.strict = strict
+
+    def compile(self) -> Callable[[Any], Any]:
+        """Собрать функцию преобразования сырого значения."""
+        if self.decode is not None:
+            return self.decode
+        scale, digits = self.scale, self.digits
+        bits = _SIGNED_BITS.get(self.type) if self.signed else None
+        limit = 1 << (bits - 1) if bits else None
+        if limit is None and scale == 1:
+            # Большинство параметров - просто целые
+            return int
+
+        def convert(raw):
+            value = int(raw)
+            # Знаковое значение может прийти в дополнительном коде без знака
+            if limit is not None and value >= limit:
+                value -= limit << 1
+            if scale != 1:
+                value = value / scale
+                if digits is not None:
+                    value = round(value, digits)
+            return value
+
+        return convert
+
+
+def _param(name: str, param_id: int, **kwargs) -> FieldSpec:
+    return FieldSpec(name, PARAM_TYPES.get(param_id, TYPE_UINT8), **kwargs)
+
+
+# Параметры cmd=1: id -> описание
+PARAM_SPECS: dict[int, FieldSpec] = {
+    0: _param("start_away_time", 0, unit="s"),
+    1: _param("end_away_time", 1, unit="s"),
+    2: _param("mode", 2, strict=True),
+    3: _param("control_type", 3, strict=True),
+    4: _param("manual_air", 4, unit="°C", strict=True),
+    5: _param("manual_floor", 5, unit="°C", strict=True),
+    6: _param("away_air", 6, unit="°C"),
+    7: _param("away_floor", 7, unit="°C"),
+    14: _param("min_temp_advanced", 14, unit="°C"),
+    15: _param("max_temp_advanced", 15, unit="°C"),
+    17: _param("power_w", 17, unit="W", decode=decode_power, strict=True),
+    18: _param("sensor_type", 18),
+    19: _param("histeresis", 19, scale=10, unit="°C", strict=True),
+    20: _param("air_correction", 20, unit="°C"),
+    21: _param("floor_correction", 21, unit="°C"),
+    23: _param("brightness", 23, strict=True),
+    25: _param("prop_koef", 25),
+    26: _param("upper_limit", 26, unit="°C"),
+    27: _param("lower_limit", 27, unit="°C"),
+    28: _param("max_schedule_period", 28),
+    29: _param("temp_temperature", 29, unit="°C"),
+    31: _param("target_temp", 31, unit="°C", strict=True),
+    33: _param("upper_air_limit", 33, unit="°C"),
+    34: _param("lower_air_limit", 34, unit="°C"),
+    52: _param("night_bright_start", 52, unit="min"),
+    53: _param("night_bright_end", 53, unit="min"),
+    109: _param("off_button_lock", 109),
+    114: _param("android_block", 114),
+    115: _param("cloud_block", 115),
+    117: _param("nc_contact_control", 117),
+    118: _param("hvac_mode", 118, strict=True),
+    120: _param("use_night_bright", 120),
+    121: _param("pre_control", 121),
+    122: _param("window_open_control", 122),
+    124: _param("children_lock", 124),
+    125: _param("power_off", 125, strict=True),
+}
+
+# Телеметрия cmd=4: известные ключи; температуры - int16 в 1/16 °C
+TELEMETRY_SPECS: dict[str, FieldSpec] = {
+    "t.0": FieldSpec("temp_air", TYPE_INT16, scale=16, unit="°C", digits=2, strict=True),
+    "t.1": FieldSpec("temp_floor", TYPE_INT16, scale=16, unit="°C", digits=2, strict=True),
+    "t.5": FieldSpec("temp_external", TYPE_INT16, scale=16, unit="°C", digits=2, strict=True),
+    "f.0": FieldSpec("power", strict=True),
+    "o.0": FieldSpec("wifi_rssi", unit="dBm", strict=True),
+}
+
+# Остальные ключи телеметрии - по префиксу ("t.3" -> температура /16)
+TELEMETRY_PREFIX_SPECS: dict[str, FieldSpec] = {
+    "t": FieldSpec("temp", TYPE_INT16, scale=16, unit="°C", digits=2),
+    "f": FieldSpec("flag"),
+    "m": FieldSpec("mode"),
+    "o": FieldSpec("other"),
+}
+
+# Значения по умолчанию для полей, которых нет в ответе
+DEFAULTS = {"power": 0, "mode": 0, "power_off": 0, "hvac_mode": 0}
+
+
+class DecodeError(ValueError):
+    """Обязательное поле не удалось разобрать."""
+
+
+class TerneoDecoder:
+    """Скомпилированный однопроходный декодер ответов устройства.
+
+    Все, что не зависит от ответа, готовится один раз: функции разбора
+    по id, набор полей со значениями по умолчанию, функция разбора для
+    ключа телеметрии без точного описания (по префиксу, один раз на
+    ключ). Параметры между опросами обычно не меняются - с cache
+    повторный список par не разбирается заново.
+    """
+
+    def __init__(
+        self,
+        param_specs: dict[int, FieldSpec] = PARAM_SPECS,
+        telemetry_specs: dict[str, FieldSpec] = TELEMETRY_SPECS,
+        prefix_specs: dict[str, FieldSpec] = TELEMETRY_PREFIX_SPECS,
+    ):
+        self._param_convert = {pid: spec.compile() for pid, spec in param_specs.items()}
+        self._param_names = {pid: spec.name for pid, spec in param_specs.items()}
+        self._strict_params = {pid for pid, spec in param_specs.items() if spec.strict}
+        self._telemetry = {
+            key: (spec.name, spec.compile(), spec.strict) for key, spec in telemetry_specs.items()
+        }
+        self._prefixes = {prefix: spec.compile() for prefix, spec in prefix_specs.items()}
+        self.param_names = [spec.name for spec in param_specs.values()]
+        self.telemetry_names = [spec.name for spec in telemetry_specs.values()]
+        self._template = dict.fromkeys(self.param_names)
+        self._template.update(dict.fromkeys(self.telemetry_names))
+        self._template.update(DEFAULTS)
+
+    def decode_params(self, par: list, named: dict | None = None) -> tuple[dict, dict]:
+        """Разобрать список par: (именованные поля, все параметры {id: значение})."""
+        named = {} if named is None else named
+        values = {}
+        converters, names = self._param_convert, self._param_names
+        for item in par:
+            try:
+                param_id, raw = item[0], item[2]
+            except IndexError:
+                continue
+            convert = converters.get(param_id)
+            if convert is None:
+                values[param_id] = _try_int(raw)
+                continue
+            try:
+                value = convert(raw)
+            except (ValueError, TypeError) as e:
+                if param_id in self._strict_params:
+                    raise DecodeError(f"param {param_id} ({names[param_id]})={raw!r}: {e}") from e
+                value = raw
+            values[param_id] = value
+            named[names[param_id]] = value
+        return named, values
+
+    def decode_telemetry(self, telemetry: dict, named: dict | None = None) -> tuple[dict, dict]:
+        """Разобрать телеметрию: (именованные поля, все ключи {key: значение})."""
+        named = {} if named is None else named
+        values = {}
+        specs = self._telemetry
+        for key, raw in telemetry.items():
+            spec = specs.get(key)
+            if spec is None:
+                spec = self._prefix_spec(key)
+            name, convert, strict = spec
+            if convert is None:
+                values[key] = raw
+                continue
+            try:
+                value = convert(raw)
+            except (ValueError, TypeError) as e:
+                if strict:
+                    raise DecodeError(f"telemetry {key} ({name})={raw!r}: {e}") from e
+                value = raw
+            values[key] = value
+            if name is not None:
+                named[name] = value
+        return named, values
+
+    def _prefix_spec(self, key: str) -> tuple:
+        """Ключ без точного описания: функция по префиксу, запоминается для ключа."""
+        spec = (None, self._prefixes.get(key.partition(".")[0]), False)
+        self._telemetry[key] = spec
+        return spec
+
+    def decode(self, par: list, telemetry: dict, cache: dict | None = None) -> dict:
+        """Разобрать параметры и телеметрию в плоский набор полей.
+
+        cache - словарь вызывающего (один на устройство): если par равен
+        разобранному в прошлый раз, берется прежний результат.
+        """
+        if cache is not None and cache.get("par") == par:
+            fields = cache["fields"].copy()
+        else:
+            fields = self._template.copy()
+            _, fields["params"] = self.decode_params(par, fields)
+            if cache is not None:
+                cache["par"] = par
+                cache["fields"] = fields.copy()
+        _, fields["telemetry"] = self.decode_telemetry(telemetry, fields)
+        return fields
+
+
+def _try_int(raw):
+    try:
+        return int(raw)
+    except (ValueError, TypeError):
+        return raw
+
+
+DECODER = TerneoDecoder()
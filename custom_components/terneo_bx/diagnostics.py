@@ -0,0 +1,91 @@
+"""Диагностика Terneo BX: производительность опроса, кэши и последние ответы."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntry
+
+from .const import DOMAIN, CONF_SERIAL
+
+TO_REDACT = {"sn", CONF_SERIAL, "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Диагностика записи конфигурации (одно устройство)."""
+    return _redact(entry, {
+        "entry": {
+            "title": entry.title,
+            "unique_id": entry.unique_id,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "device": _device_diagnostics(hass, entry),
+    })
+
+
+async def async_get_device_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry, device: DeviceEntry
+) -> dict[str, Any]:
+    """Диагностика устройства."""
+    return _redact(entry, _device_diagnostics(hass, entry))
+
+
+def _redact(entry: ConfigEntry, diagnostics: dict[str, Any]) -> dict[str, Any]:
+    """Убрать серийный номер: по ключам и везде, где он встречается в строках (title и т.п.)."""
+    serials = {str(value) for value in (entry.data.get(CONF_SERIAL), entry.unique_id) if value}
+    return _replace_serials(async_redact_data(diagnostics, TO_REDACT), serials)
+
+
+def _replace_serials(value, serials: set[str]):
+    if not serials:
+        return value
+    if isinstance(value, str):
+        for serial in serials:
+            value = value.replace(serial, REDACTED)
+        return value
+    if isinstance(value, dict):
+        return {key: _replace_serials(item, serials) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_serials(item, serials) for item in value]
+    return value
+
+
+def _device_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if not entry_data:
+        return {"loaded": False}
+    coordinator = entry_data["coordinator"]
+    api = coordinator.api
+    channel = api.channel
+    state = coordinator.diagnostics()
+
+    return {
+        "loaded": True,
+        "host": coordinator.host,
+        "address": api.host,
+        "coordinator": state["coordinator"],
+        "cache": state["cache"],
+        "api": {
+            "error_count": api.error_count,
+            "last_error": api.last_error,
+            "last_success": api.last_success.isoformat() if api.last_success else None,
+            "last_request_ms": api.last_request_duration,
+            "commands": api.metrics.summary(),
+            "breaker": api.breaker.as_dict(),
+            "timeouts": api.timeouts.as_dict(),
+        },
+        "queue": {
+            "depth": channel.queue_depth,
+            "last_wait": channel.last_wait,
+            "max_wait": channel.max_wait,
+            "completed": channel.completed,
+            "dropped": channel.dropped,
+        },
+        "writer": state["writer"],
+        "history": state["history"],
+        "data": state["data"],
+        "payloads": state["payloads"],
+    }
@@ -0,0 +1,224 @@
+"""Поиск устройств Terneo: UDP-рассылка плюс параллельный опрос подсети."""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import json
+import logging
+import socket
+import time
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    API_ENDPOINT,
+    CMD_TELEMETRY,
+    DATA_LISTENER,
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_PROBE_TIMEOUT,
+    DISCOVERY_QUIET_PERIOD,
+    DISCOVERY_MAX_HOSTS,
+)
+from .listener import decode_broadcast
+from .session import async_get_session
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class InvalidSubnet(ValueError):
+    """Подсеть не разобрана или слишком велика для опроса."""
+
+
+def parse_subnet(subnet: str) -> list[str]:
+    """Адреса хостов подсети ("192.168.1.0/24", "192.168.1.7" - один адрес)."""
+    try:
+        network = ipaddress.ip_network(subnet.strip(), strict=False)
+    except ValueError as e:
+        raise InvalidSubnet(str(e)) from e
+    if network.version != 4:
+        raise InvalidSubnet("only IPv4 subnets are supported")
+    if network.num_addresses > DISCOVERY_MAX_HOSTS:
+        raise InvalidSubnet(f"subnet has more than {DISCOVERY_MAX_HOSTS} addresses")
+    if network.num_addresses == 1:
+        return [str(network.network_address)]
+    return [str(ip) for ip in network.hosts()]
+
+
+class _BroadcastCollector(asyncio.DatagramProtocol):
+    """Временный приемник рассылки, пока постоянный не запущен."""
+
+    def __init__(self, on_found):
+        self._on_found = on_found
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        payload = decode_broadcast(data)
+        if payload is not None:
+            self._on_found(str(payload["sn"]), addr[0])
+
+
+class TerneoDiscovery:
+    """Один проход поиска: устройства собираются в found (sn -> ip).
+
+    Рассылку слушает постоянный приемник (если он уже занял порт) или
+    временный сокет; параллельно каждому адресу подсети отправляется
+    cmd=4 не более чем DISCOVERY_CONCURRENCY запросов одновременно.
+    Поиск заканчивается по таймауту или раньше - когда подсеть опрошена
+    и новые устройства не появлялись DISCOVERY_QUIET_PERIOD секунд.
+    Без подсети поиск всегда длится весь таймаут: момент рассылки
+    выбирает само устройство.
+    """
+
+    def __init__(self, hass: HomeAssistant, port: int, timeout: float, subnet: str | None = None):
+        self.hass = hass
+        self.port = port
+        self.timeout = timeout
+        self.hosts = parse_subnet(subnet) if subnet else []
+        self.found: dict[str, str] = {}
+        self.probed = 0
+        self._last_found = time.monotonic()
+        self._changed = asyncio.Event()
+
+    def _add(self, serial: str, ip: str) -> None:
+        if self.found.get(serial) != ip:
+            if serial not in self.found:
+                self._last_found = time.monotonic()
+            self.found[serial] = ip
+            self._changed.set()
+
+    async def async_run(self) -> dict[str, str]:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        listener = self.hass.data.get(DATA_LISTENER)
+        transport = None
+        if listener is not None and listener.port == self.port:
+            # Порт занят постоянным приемником: устройства, приславшие рассылку
+            # за последний таймаут, уже известны
+            for serial, ip in listener.seen_since(start - self.timeout).items():
+                self._add(serial, ip)
+        else:
+            try:
+                transport, _ = await self.hass.loop.create_datagram_endpoint(
+                    lambda: _BroadcastCollector(self._add),
+                    local_addr=("0.0.0.0", self.port),
+                    reuse_port=hasattr(socket, "SO_REUSEPORT"),
+                    allow_broadcast=True,
+                )
+            except (OSError, ValueError) as e:
+                _LOGGER.debug("Cannot listen for broadcasts on port %s: %s", self.port, e)
+
+        sweep = self.hass.async_create_task(self._async_sweep()) if self.hosts else None
+        try:
+            while (now := time.monotonic()) < deadline:
+                if listener is not None and transport is None:
+                    for serial, ip in listener.seen_since(start).items():
+                        self._add(serial, ip)
+                if sweep is not None and sweep.done() and now - self._last_found >= DISCOVERY_QUIET_PERIOD:
+                    break
+                self._changed.clear()
+                wait = deadline - now
+                if sweep is not None and sweep.done():
+                    wait = min(wait, self._last_found + DISCOVERY_QUIET_PERIOD - now)
+                elif listener is not None and transport is None:
+                    # Постоянный приемник не будит нас - проверяем его периодически
+                    wait = min(wait, DISCOVERY_QUIET_PERIOD / 2)
+                try:
+                    await asyncio.wait_for(self._wait_progress(sweep), max(wait, 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if sweep is not None and not sweep.done():
+                sweep.cancel()
+            elif sweep is not None and sweep.exception() is not None:
+                _LOGGER.warning("Subnet scan failed: %s", sweep.exception())
+            if transport is not None:
+                transport.close()
+
+        _LOGGER.info(
+            "Discovery found %d Terneo device(s) in %.1fs (%d addresses probed)",
+            len(self.found), time.monotonic() - start, self.probed,
+        )
+        return dict(self.found)
+
+    async def _wait_progress(self, sweep: asyncio.Task | None) -> None:
+        """Дождаться нового устройства или окончания опроса подсети."""
+        waiters = [self.hass.async_create_task(self._changed.wait())]
+        if sweep is not None and not sweep.done():
+            waiters.append(sweep)
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiters[0].cancel()
+
+    async def _async_sweep(self) -> None:
+        await async_probe_hosts(self.hass, self.hosts, self._add)
+        self.probed = len(self.hosts)
+
+
+async def async_probe_hosts(hass: HomeAssistant, hosts: list[str], on_found) -> None:
+    """Отправить cmd=4 каждому адресу; on_found(sn, ip) - для ответивших Terneo."""
+    session = async_get_session(hass)
+    semaphore = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=DISCOVERY_PROBE_TIMEOUT)
+
+    async def probe(ip: str) -> None:
+        async with semaphore:
+            serial = await _async_probe(session, ip, timeout)
+        if serial:
+            on_found(serial, ip)
+
+    await asyncio.gather(*(probe(ip) for ip in hosts))
+
+
+async def _async_probe(session: aiohttp.ClientSession, ip: str, timeout: aiohttp.ClientTimeout) -> str | None:
+    """Серийный номер устройства по адресу или None, если это не Terneo."""
+    try:
+        async with session.post(
+            f"http://{ip}{API_ENDPOINT}", json={"cmd": CMD_TELEMETRY}, timeout=timeout
+        ) as resp:
+            if resp.status != 200:
+                return None
+            payload = json.loads(await resp.text())
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(payload, dict) or not payload.get("sn"):
+        return None
+    return str(payload["sn"])
+
+
+async def async_probe_serial(hass: HomeAssistant, ip: str) -> str | None:
+    """Серийный номер устройства, отвечающего по адресу ip (или None)."""
+    timeout = aiohttp.ClientTimeout(total=DISCOVERY_PROBE_TIMEOUT)
+    return await _async_probe(async_get_session(hass), ip, timeout)
+
+
+async def async_discover(
+    hass: HomeAssistant, port: int, timeout: float, subnet: str | None = None
+) -> dict[str, str]:
+    """Найти устройства в сети: {sn: ip}."""
+    return await TerneoDiscovery(hass, port, timeout, subnet).async_run()
+
+
+async def async_locate(hass: HomeAssistant, serial: str, near: str) -> str | None:
+    """Найти новый адрес устройства в подсети /24 его прежнего адреса.
+
+    Опрос прекращается на первом ответе с нужным sn. Для адресов, которые
+    не являются IPv4 (имя хоста), поиск не выполняется.
+    """
+    try:
+        hosts = [ip for ip in parse_subnet(f"{near}/24") if ip != near]
+    except InvalidSubnet:
+        return None
+    found = hass.loop.create_future()
+
+    def on_found(sn: str, ip: str) -> None:
+        if sn == str(serial) and not found.done():
+            found.set_result(ip)
+
+    sweep = hass.async_create_task(async_probe_hosts(hass, hosts, on_found))
+    try:
+        await asyncio.wait([sweep, found], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not sweep.done():
+            sweep.cancel()
+    return found.result() if found.done() else None
@@ -0,0 +1,169 @@
+"""Скважность работы реле по истории переключений."""
+from __future__ import annotations
+
+import time
+from array import array
+
+from .const import DUTY_HISTORY_SIZE, DUTY_WINDOWS, DUTY_MIN_COVERAGE
+
+
+class _Window:
+    """Суммы по интервалам реле, пересекающим скользящее окно."""
+
+    __slots__ = ("length", "tail", "on_seconds", "period_seconds", "on_periods", "starts")
+
+    def __init__(self, length: int):
+        self.length = length
+        self.tail = 0              # номер первого перехода, чей интервал попадает в окно
+        self.on_seconds = 0.0      # полная длительность завершенных включений с tail
+        self.period_seconds = 0.0  # то же без начального состояния (его начало не наблюдалось)
+        self.on_periods = 0        # число завершенных включений с tail (без начального)
+        self.starts = 0            # число включений (переходов в 1) с tail
+
+
+class TerneoDutyCycleTracker:
+    """Кольцевой буфер переключений реле и статистика по окнам 1ч/24ч.
+
+    Переходы хранятся в типизированных массивах фиксированного размера
+    (время - array('d'), состояние - array('b')), поэтому память на
+    устройство не растет. Для каждого окна суммы поддерживаются
+    инкрементально: новый переход добавляет завершенный интервал,
+    устаревшие интервалы вычитаются при сдвиге окна - O(1) в среднем.
+
+    Первая запись после запуска (номер 0) - начальное состояние, а не
+    переход: она не считается включением и не входит в среднее время
+    включения. Пока история покрывает меньше DUTY_MIN_COVERAGE окна,
+    статистика окна не выдается.
+    """
+
+    def __init__(self, capacity: int = DUTY_HISTORY_SIZE, windows=DUTY_WINDOWS):
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._states = array("b", bytes(capacity))
+        self._next = 0  # сквозной номер следующего перехода
+        self.last_update = None
+        self.windows = {length: _Window(length) for length in windows}
+
+    def __len__(self) -> int:
+        return min(self._next, self._capacity)
+
+    @property
+    def state(self) -> int | None:
+        if not self._next:
+            return None
+        return self._states[(self._next - 1) % self._capacity]
+
+    @property
+    def changed_at(self) -> float | None:
+        """Время последнего переключения реле."""
+        if not self._next:
+            return None
+        return self._times[(self._next - 1) % self._capacity]
+
+    def update(self, state: int, at: float | None = None) -> None:
+        """Учесть состояние реле на момент at (записывается только смена).
+
+        Настоящий момент переключения между двумя обновлениями неизвестен
+        (при опросе раз в несколько минут); он берется посередине
+        интервала, так что ошибка не больше половины интервала и не
+        накапливается в одну сторону.
+        """
+        at = time.time() if at is None else at
+        if self.last_update is not None and at < self.last_update:
+            # Часы ушли назад - история больше не сопоставима
+            self.reset()
+        if state != self.state:
+            self._append(state, at if self.last_update is None else (self.last_update + at) / 2)
+        self.last_update = at
+        self._evict(at)
+
+    def reset(self) -> None:
+        self._next = 0
+        self.last_update = None
+        self.windows = {length: _Window(length) for length in self.windows}
+
+    def _append(self, state: int, at: float) -> None:
+        n, capacity = self._next, self._capacity
+        if n:
+            # Завершить интервал предыдущего перехода
+            prev = (n - 1) % capacity
+            if self._states[prev]:
+                duration = at - self._times[prev]
+                for window in self.windows.values():
+                    window.on_seconds += duration
+                    if n > 1:
+                        window.period_seconds += duration
+                        window.on_periods += 1
+        oldest = n - capacity
+        if oldest >= 0:
+            # Буфер полон - затираемый переход уходит из всех окон
+            for window in self.windows.values():
+                while window.tail <= oldest:
+                    self._drop(window)
+        pos = n % capacity
+        self._times[pos] = at
+        self._states[pos] = 1 if state else 0
+        if state and n:
+            for window in self.windows.values():
+                window.starts += 1
+        self._next = n + 1
+
+    def _drop(self, window: _Window) -> None:
+        i = window.tail
+        pos = i % self._capacity
+        if self._states[pos]:
+            if i:
+                window.starts -= 1
+            if i < self._next - 1:
+                duration = self._times[(i + 1) % self._capacity] - self._times[pos]
+                window.on_seconds -= duration
+                if i:
+                    window.period_seconds -= duration
+                    window.on_periods -= 1
+        window.tail = i + 1
+
+    def _evict(self, now: float) -> None:
+        last = self._next - 1
+        times, capacity = self._times, self._capacity
+        for window in self.windows.values():
+            start = now - window.length
+            while window.tail < last and times[(window.tail + 1) % capacity] <= start:
+                self._drop(window)
+
+    def stats(self, length: int) -> dict | None:
+        """Скважность (%), включений в час и среднее включение (с) за окно."""
+        window = self.windows[length]
+        now = self.last_update
+        if now is None or not self._next:
+            return None
+        capacity = self._capacity
+        start = now - length
+        last = (self._next - 1) % capacity
+        tail = window.tail % capacity
+        tail_time = self._times[tail]
+
+        on_time = window.on_seconds
+        starts = window.starts
+        if self._states[last]:
+            on_time += now - self._times[last]
+        if tail_time < start:
+            # Начало первого интервала лежит до окна
+            if self._states[tail]:
+                on_time -= start - tail_time
+                if window.tail:
+                    starts -= 1
+            span = length
+        else:
+            span = now - tail_time
+
+        if span <= 0 or span < length * DUTY_MIN_COVERAGE:
+            # Сразу после запуска история слишком коротка для окна
+            return None
+        return {
+            "duty_cycle": round(100 * on_time / span, 1),
+            "cycles_per_hour": round(starts * 3600 / span, 2),
+            "average_on_time": (
+                round(window.period_seconds / window.on_periods, 1) if window.on_periods else None
+            ),
+            "window": span,
+        }
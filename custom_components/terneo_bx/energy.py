@@ -0,0 +1,125 @@
+"""Накопление потребленной энергии по переключениям реле."""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+
+from .const import ENERGY_UPDATE_INTERVAL_MAX, ENERGY_MIN_INCREMENT, ENERGY_BUCKET_HOURS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TerneoEnergyAccumulator:
+    """Счетчик энергии, который питается обновлениями координатора.
+
+    Мощность между двумя обновлениями считается постоянной и равной
+    мощности на момент предыдущего обновления (реле держит состояние до
+    следующего переключения), поэтому энергия добавляется прямоугольником
+    в момент каждого нового состояния. Если реле переключилось между
+    обновлениями, интервал делится в момент переключения, который
+    оценивает трекер скважности. Обновление - O(1), чтение ничего не
+    меняет, итог не зависит от того, как часто HA читает сенсор.
+
+    Параллельно ведутся часовые корзины [начало часа (UTC), кВт*ч, секунды
+    включенного реле] для долгосрочной статистики. Корзин не больше
+    ENERGY_BUCKET_HOURS: если их долго не забирают, старые вытесняются.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.total = 0.0          # кВт*ч
+        self.power = 0            # текущая мощность нагрузки, Вт
+        self.last_update = None   # time.time() последнего обновления
+        self.buckets: deque[list] = deque(maxlen=ENERGY_BUCKET_HOURS)
+
+    def update(self, power: float, at: float | None = None, changed_at: float | None = None) -> None:
+        """Учесть новое состояние нагрузки на момент at.
+
+        changed_at - момент переключения реле, если оно было между
+        обновлениями (см. TerneoDutyCycleTracker.changed_at): до него
+        действует прежняя мощность, после - новая.
+        """
+        at = time.time() if at is None else at
+        if self.last_update is not None:
+            elapsed = at - self.last_update
+            if elapsed > ENERGY_UPDATE_INTERVAL_MAX:
+                # Защита от скачков после перезапуска или долгой недоступности
+                _LOGGER.debug(
+                    f"Large time gap detected for {self.host}: {elapsed / 3600:.2f}h. "
+                    f"Skipping energy calculation to prevent anomaly."
+                )
+            elif elapsed > 0:
+                if changed_at is not None and self.last_update < changed_at < at:
+                    increment = self._integrate(self.power, self.last_update, changed_at)
+                    increment += self._integrate(power, changed_at, at)
+                else:
+                    increment = self._integrate(self.power, self.last_update, at)
+                self.total += increment
+                if increment > ENERGY_MIN_INCREMENT:
+                    _LOGGER.debug(
+                        f"Energy {self.host}: Δt={elapsed:.1f}s, P={self.power}→{power}W, "
+                        f"+{increment * 1000:.2f}Wh, total={self.total:.3f}kWh"
+                    )
+            elif elapsed < 0:
+                # Часы ушли назад - начинаем отсчет заново
+                _LOGGER.debug(f"Clock went backwards for {self.host}, restarting energy interval")
+        self.power = power
+        self.last_update = at
+
+    def _integrate(self, power: float, start: float, end: float) -> float:
+        """Энергия (кВт*ч) постоянной мощности на [start, end) с раскладкой по часам."""
+        self._add_to_buckets(power, start, end)
+        return power * (end - start) / 3_600_000  # Вт*с → кВт*ч
+
+    def _add_to_buckets(self, power: float, start: float, end: float) -> None:
+        """Разложить интервал [start, end) постоянной мощности по часам."""
+        buckets = self.buckets
+        while start < end:
+            hour = start - start % 3600
+            chunk_end = min(end, hour + 3600)
+            if not buckets or buckets[-1][0] != hour:
+                buckets.append([hour, 0.0, 0.0])
+            bucket = buckets[-1]
+            if power > 0:
+                bucket[1] += power * (chunk_end - start) / 3_600_000
+                bucket[2] += chunk_end - start
+            start = chunk_end
+
+    @property
+    def has_closed_hours(self) -> bool:
+        """Есть часы, полностью покрытые обновлениями."""
+        return (
+            bool(self.buckets)
+            and self.last_update is not None
+            and self.buckets[0][0] + 3600 <= self.last_update
+        )
+
+    def pop_closed_hours(self) -> list[tuple[float, float, float]]:
+        """Забрать закрытые часы: [(начало часа, кВт*ч, секунды работы), ...]."""
+        closed = []
+        buckets = self.buckets
+        if self.last_update is None:
+            # Сразу после reset(): граница данных неизвестна до следующего обновления
+            return closed
+        # Час закрыт, только когда данные дошли до его конца - иначе
+        # следующее обновление еще допишет в него энергию
+        while buckets and buckets[0][0] + 3600 <= self.last_update:
+            closed.append(tuple(buckets.popleft()))
+        return closed
+
+    def restore(self, total: float, power: float = 0, last_update: float | None = None) -> None:
+        """Восстановить состояние после перезапуска."""
+        self.total = total
+        self.power = power
+        self.last_update = last_update
+
+    def reset(self) -> None:
+        """Обнулить счетчик; следующий интервал начнется со следующего обновления.
+
+        Часовые корзины сохраняются: потребление до сброса остается в
+        долгосрочной статистике и выгружается после следующего обновления.
+        """
+        self.total = 0.0
+        self.power = 0
+        self.last_update = None
@@ -0,0 +1,121 @@
+"""Кольцевой буфер телеметрии высокого разрешения."""
+from __future__ import annotations
+
+import math
+import time
+from array import array
+
+from .const import TELEMETRY_HISTORY_SIZE
+
+NAN = float("nan")
+
+# Поля снимка, которые пишутся в историю
+SERIES = ("temp_air", "temp_floor", "temp_external", "power", "wifi_rssi")
+
+
+class TerneoTelemetryHistory:
+    """Последние TELEMETRY_HISTORY_SIZE отсчетов телеметрии устройства.
+
+    Каждый ряд - array('d') фиксированного размера, отсутствующее
+    значение хранится как NaN. Время отсчетов не убывает, поэтому
+    диапазон ищется бинарным поиском прямо по кольцу.
+    """
+
+    def __init__(self, capacity: int = TELEMETRY_HISTORY_SIZE, series=SERIES):
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._series = {name: array("d", bytes(8 * capacity)) for name in series}
+        self._next = 0  # сквозной номер следующего отсчета
+
+    def __len__(self) -> int:
+        return min(self._next, self._capacity)
+
+    @property
+    def series(self) -> tuple[str, ...]:
+        return tuple(self._series)
+
+    def append(self, snapshot, at: float | None = None) -> None:
+        """Записать отсчет из снимка координатора."""
+        at = time.time() if at is None else at
+        if self._next and at < self._times[(self._next - 1) % self._capacity]:
+            # Часы ушли назад - старая история не сопоставима с новой
+            self._next = 0
+        pos = self._next % self._capacity
+        self._times[pos] = at
+        for name, values in self._series.items():
+            value = getattr(snapshot, name, None)
+            values[pos] = NAN if value is None else float(value)
+        self._next += 1
+
+    def _first(self) -> int:
+        return max(0, self._next - self._capacity)
+
+    def _time(self, i: int) -> float:
+        return self._times[i % self._capacity]
+
+    def _bisect(self, moment: float) -> int:
+        """Сквозной номер первого отсчета с временем >= moment."""
+        lo, hi = self._first(), self._next
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time(mid) < moment:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def downsample(self, start: float | None, end: float | None, buckets: int) -> dict:
+        """Свернуть отсчеты [start, end) в не более чем buckets корзин min/max/mean.
+
+        Возвращает {"start", "end", "bucket", "points": [{"time", "count",
+        <ряд>: [min, max, mean] или None}, ...]}; пустые корзины пропускаются.
+        """
+        if not self._next:
+            return {"start": start, "end": end, "bucket": None, "points": []}
+        if start is None:
+            start = self._time(self._first())
+        if end is None:
+            end = self._time(self._next - 1) + 1e-6
+        lo, hi = self._bisect(start), self._bisect(end)
+        width = (end - start) / max(1, buckets)
+        if width <= 0:
+            return {"start": start, "end": end, "bucket": None, "points": []}
+
+        capacity = self._capacity
+        series = list(self._series.items())
+        points = []
+        current = None
+        acc = None
+        for i in range(lo, hi):
+            pos = i % capacity
+            bucket = min(int((self._times[pos] - start) / width), buckets - 1)
+            if bucket != current:
+                if acc is not None:
+                    points.append(_finish(start + current * width, acc, series))
+                current = bucket
+                # ряд -> [min, max, сумма, число значений]; общий счетчик отсчетов
+                acc = [[math.inf, -math.inf, 0.0, 0] for _ in series] + [0]
+            acc[-1] += 1
+            for k, (_, values) in enumerate(series):
+                value = values[pos]
+                if value != value:  # NaN
+                    continue
+                stat = acc[k]
+                if value < stat[0]:
+                    stat[0] = value
+                if value > stat[1]:
+                    stat[1] = value
+                stat[2] += value
+                stat[3] += 1
+        if acc is not None:
+            points.append(_finish(start + current * width, acc, series))
+
+        return {"start": start, "end": end, "bucket": width, "points": points}
+
+
+def _finish(bucket_start: float, acc: list, series: list) -> dict:
+    point = {"time": round(bucket_start, 3), "count": acc[-1]}
+    for k, (name, _) in enumerate(series):
+        low, high, total, count = acc[k]
+        point[name] = [low, high, round(total / count, 3)] if count else None
+    return point
@@ -0,0 +1,115 @@
+"""Постоянный приемник UDP-рассылки устройств Terneo (порт 9000)."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import socket
+import re
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_LISTENER, BROADCAST_PORT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Ключи телеметрии вида "t.0", "f.0", "o.0"
+TELEMETRY_KEY = re.compile(r"^[a-z]\.\d+$")
+
+
+def decode_broadcast(data: bytes) -> dict | None:
+    """Разобрать датаграмму устройства (JSON с полем sn)."""
+    try:
+        payload = json.loads(data.decode("utf-8", "ignore").strip("\x00 \r\n"))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or not payload.get("sn"):
+        return None
+    return payload
+
+
+class TerneoBroadcastListener(asyncio.DatagramProtocol):
+    """Принимает рассылки устройств и передает телеметрию координаторам."""
+
+    def __init__(self, hass: HomeAssistant, port: int = BROADCAST_PORT):
+        self.hass = hass
+        self.port = port
+        self._transport: asyncio.DatagramTransport | None = None
+        self._coordinators: dict[str, object] = {}
+        # sn -> (ip, время последней рассылки по monotonic)
+        self.devices: dict[str, tuple[str, float]] = {}
+        self.datagrams = 0
+
+    async def async_start(self) -> None:
+        self._transport, _ = await self.hass.loop.create_datagram_endpoint(
+            lambda: self,
+            local_addr=("0.0.0.0", self.port),
+            reuse_port=hasattr(socket, "SO_REUSEPORT"),
+            allow_broadcast=True,
+        )
+        _LOGGER.info("Listening for Terneo broadcasts on UDP port %s", self.port)
+
+    @callback
+    def async_stop(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    @callback
+    def async_register(self, serial: str, coordinator) -> None:
+        self._coordinators[serial] = coordinator
+
+    @callback
+    def async_unregister(self, serial: str) -> None:
+        self._coordinators.pop(serial, None)
+
+    def seen_since(self, since: float) -> dict[str, str]:
+        """Устройства (sn -> ip), приславшие рассылку после момента since."""
+        return {sn: ip for sn, (ip, ts) in self.devices.items() if ts >= since}
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        payload = decode_broadcast(data)
+        if payload is None:
+            return
+        self.datagrams += 1
+        serial = str(payload["sn"])
+        self.devices[serial] = (addr[0], time.monotonic())
+
+        coordinator = self._coordinators.get(serial)
+        if coordinator is None:
+            return
+        if addr[0] != coordinator.api.host:
+            # DHCP выдал устройству новый адрес
+            coordinator.async_handle_address(addr[0])
+        telemetry = {k: v for k, v in payload.items() if TELEMETRY_KEY.match(k)}
+        if telemetry:
+            coordinator.async_handle_push(telemetry)
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.debug("Broadcast listener error: %s", exc)
+
+
+async def async_get_listener(hass: HomeAssistant) -> TerneoBroadcastListener | None:
+    """Вернуть запущенный приемник, запустив его при первом обращении."""
+    listener = hass.data.get(DATA_LISTENER)
+    if listener is not None:
+        return listener
+    listener = TerneoBroadcastListener(hass)
+    # Сохраняем до запуска, чтобы параллельная настройка записей не создала второй
+    hass.data[DATA_LISTENER] = listener
+    try:
+        await listener.async_start()
+    except (OSError, ValueError) as e:
+        _LOGGER.warning(f"Cannot listen for Terneo broadcasts, using HTTP polling only: {e}")
+        hass.data.pop(DATA_LISTENER, None)
+        return None
+    return listener
+
+
+@callback
+def async_stop_listener(hass: HomeAssistant) -> None:
+    """Остановить приемник (после выгрузки последнего устройства)."""
+    listener = hass.data.pop(DATA_LISTENER, None)
+    if listener is not None:
+        listener.async_stop()
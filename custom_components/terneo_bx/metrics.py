@@ -0,0 +1,138 @@
+"""Гистограммы задержек запросов к устройству по типам команд."""
+from __future__ import annotations
+
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from .const import LATENCY_BUCKETS_MS, METRICS_WINDOW, METRICS_SLICES
+
+# Типы команд
+KIND_PARAMS = "params"
+KIND_SCHEDULE = "schedule"
+KIND_TIME = "time"
+KIND_TELEMETRY = "telemetry"
+KIND_WRITE = "write"
+KIND_TEST = "test"
+
+# Исходы запросов
+OUTCOME_SUCCESS = "success"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_HTTP_ERROR = "http_error"
+OUTCOME_JSON_ERROR = "json_error"
+OUTCOME_ERROR = "error"  # соединение не установлено и прочие ошибки клиента
+
+
+class LatencyHistogram:
+    """Гистограмма с фиксированными корзинами за скользящее окно.
+
+    Окно разбито на METRICS_SLICES частей; при сдвиге самая старая часть
+    обнуляется, поэтому запись - O(1), а перцентиль - O(число корзин).
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS, window: float = METRICS_WINDOW, slices: int = METRICS_SLICES):
+        self.bounds = tuple(bounds)  # верхние границы корзин, мс; последняя - все, что больше
+        size = len(self.bounds) + 1
+        self._slice_ns = int(window * 1e9 / slices)
+        self._slices = [array("L", bytes(array("L").itemsize * size)) for _ in range(slices)]
+        self._current = 0
+        self._slice_start = time.monotonic_ns()
+
+    def _rotate(self, now_ns: int) -> None:
+        passed = (now_ns - self._slice_start) // self._slice_ns
+        if passed <= 0:
+            return
+        for _ in range(min(passed, len(self._slices))):
+            self._current = (self._current + 1) % len(self._slices)
+            counts = self._slices[self._current]
+            for i in range(len(counts)):
+                counts[i] = 0
+        self._slice_start += passed * self._slice_ns
+
+    def record(self, duration_ms: float, now_ns: int | None = None) -> None:
+        self._rotate(time.monotonic_ns() if now_ns is None else now_ns)
+        self._slices[self._current][bisect_left(self.bounds, duration_ms)] += 1
+
+    def counts(self, now_ns: int | None = None) -> list[int]:
+        """Сумма корзин за окно."""
+        self._rotate(time.monotonic_ns() if now_ns is None else now_ns)
+        total = [0] * (len(self.bounds) + 1)
+        for counts in self._slices:
+            for i, value in enumerate(counts):
+                total[i] += value
+        return total
+
+    def percentiles(self, points=(50, 95, 99), counts: list[int] | None = None) -> dict[int, float | None]:
+        """Перцентили (мс) с линейной интерполяцией внутри корзины."""
+        counts = self.counts() if counts is None else counts
+        return percentiles_from_counts(self.bounds, counts, points)
+
+
+def percentiles_from_counts(bounds, counts: list[int], points) -> dict[int, float | None]:
+    total = sum(counts)
+    result = {}
+    for point in points:
+        if not total:
+            result[point] = None
+            continue
+        rank = point / 100 * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = bounds[i - 1] if i > 0 else 0.0
+                if i >= len(bounds):
+                    # Хвост без верхней границы
+                    result[point] = float(lower)
+                else:
+                    result[point] = round(lower + (bounds[i] - lower) * (rank - cumulative) / count, 1)
+                break
+            cumulative += count
+    return result
+
+
+class TerneoApiMetrics:
+    """Задержки и исходы запросов одного устройства по типам команд."""
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.outcomes: dict[str, Counter] = {}
+
+    def record(self, kind: str, outcome: str, duration_ns: int) -> None:
+        outcomes = self.outcomes.get(kind)
+        if outcomes is None:
+            outcomes = self.outcomes[kind] = Counter()
+            self.histograms[kind] = LatencyHistogram()
+        outcomes[outcome] += 1
+        self.histograms[kind].record(duration_ns / 1e6)
+
+    def percentiles(self, kind: str | None = None, points=(50, 95, 99)) -> dict[int, float | None]:
+        """Перцентили за окно по одному типу команд или по всем сразу."""
+        if kind is not None:
+            histogram = self.histograms.get(kind)
+            return histogram.percentiles(points) if histogram else dict.fromkeys(points)
+        counts = None
+        bounds = LATENCY_BUCKETS_MS
+        for histogram in self.histograms.values():
+            current = histogram.counts()
+            counts = current if counts is None else [a + b for a, b in zip(counts, current)]
+        if counts is None:
+            return dict.fromkeys(points)
+        return percentiles_from_counts(bounds, counts, points)
+
+    def summary(self) -> dict[str, dict]:
+        """{тип: {p50, p95, p99, success, timeout, ...}} для атрибутов и диагностики."""
+        result = {}
+        for kind, outcomes in self.outcomes.items():
+            p = self.histograms[kind].percentiles()
+            result[kind] = {
+                "p50": p[50],
+                "p95": p[95],
+                "p99": p[99],
+                **outcomes,
+            }
+        return result
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.outcomes.clear()
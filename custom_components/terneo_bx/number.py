@@ -1,6 +1,5 @@
 from __future__ import annotations
 import logging
-import asyncio
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
@@ -36,7 +35,7 @@ class TerneoBrightnessNumber(CoordinatorEntity, NumberEntity):
     _attr_icon = "mdi:brightness-6"
 
     def __init__(self, coordinator: TerneoCoordinator, api: TerneoApi, host: str, serial: str):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset({("params", 23)}))
         self.api = api
         self._host = host
         self._serial = serial
@@ -56,8 +55,7 @@ class TerneoBrightnessNumber(CoordinatorEntity, NumberEntity):
     @property
     def native_value(self):
         """Возвращает текущую яркость (0-9)."""
-        params_dict = self.coordinator.data.get("params_dict", {})
-        brightness_raw = params_dict.get(23)
+        brightness_raw = self.coordinator.data.params.get(23)
         
         if brightness_raw is None:
             return None
@@ -73,14 +71,8 @@ class TerneoBrightnessNumber(CoordinatorEntity, NumberEntity):
             brightness = int(value)
             _LOGGER.debug(f"Setting brightness to {brightness}")
             
-            # ID=23, type=2 (uint8)
-            await self.api.set_parameter(23, brightness, self._serial)
-            
-            # Небольшая задержка для применения изменений
-            await asyncio.sleep(self.coordinator.calc_delay())
-            
-            # Обновляем данные
-            await self.coordinator.async_refresh()
+            # ID=23, type=2 (uint8); шаги слайдера объединяются в одну запись
+            await self.coordinator.async_write_parameters({23: brightness})
             
         except CannotConnect as e:
             _LOGGER.error(f"Cannot connect to set brightness: {e}")
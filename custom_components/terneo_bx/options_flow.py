@@ -1,6 +1,19 @@
 import voluptuous as vol
 from homeassistant import config_entries
-from .const import DEFAULT_SCAN_INTERVAL, DEFAULT_DELAY_MULTIPLIER
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_DELAY_MULTIPLIER,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    MIN_SCAN_INTERVAL,
+    MAX_SCAN_INTERVAL,
+    MAX_ADAPTIVE_SCAN_INTERVAL,
+    TIMEOUT_READ_MAX,
+    MIN_MAX_TIMEOUT,
+    MAX_MAX_TIMEOUT,
+    MIN_DELAY_MULTIPLIER,
+    MAX_DELAY_MULTIPLIER,
+)
 
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
@@ -25,16 +38,43 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             self.entry.data.get('delay_multiplier', DEFAULT_DELAY_MULTIPLIER)
         )
 
+        current_adaptive_polling = self.entry.options.get(
+            'adaptive_polling', DEFAULT_ADAPTIVE_POLLING
+        )
+
+        current_max_scan_interval = self.entry.options.get(
+            'max_scan_interval', DEFAULT_MAX_SCAN_INTERVAL
+        )
+
+        current_max_timeout = self.entry.options.get(
+            'max_timeout', TIMEOUT_READ_MAX
+        )
+
         schema = vol.Schema({
             vol.Optional(
                 'scan_interval',
                 default=current_scan_interval
-            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+            ): vol.All(vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL)),
+
+            vol.Optional(
+                'adaptive_polling',
+                default=current_adaptive_polling
+            ): bool,
+
+            vol.Optional(
+                'max_scan_interval',
+                default=current_max_scan_interval
+            ): vol.All(vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_ADAPTIVE_SCAN_INTERVAL)),
             
             vol.Optional(
                 'delay_multiplier',
                 default=current_delay_multiplier
-            ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=5.0)),
+            ): vol.All(vol.Coerce(float), vol.Range(min=MIN_DELAY_MULTIPLIER, max=MAX_DELAY_MULTIPLIER)),
+
+            vol.Optional(
+                'max_timeout',
+                default=current_max_timeout
+            ): vol.All(vol.Coerce(float), vol.Range(min=MIN_MAX_TIMEOUT, max=MAX_MAX_TIMEOUT)),
         })
 
         return self.async_show_form(step_id="init", data_schema=schema)
\ No newline at end of file
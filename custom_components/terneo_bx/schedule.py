@@ -0,0 +1,328 @@
+"""Недельный индекс интервалов расписания и отслеживание переходов."""
+from __future__ import annotations
+
+import datetime
+import logging
+from array import array
+from bisect import bisect_right
+from datetime import timedelta
+from typing import Callable, Iterator, NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+from .const import SCHEDULE_TEMP_MIN, SCHEDULE_TEMP_MAX
+
+_LOGGER = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+class ScheduleState(NamedTuple):
+    """Положение в расписании на заданный момент."""
+
+    event: tuple[datetime.datetime, datetime.datetime, int] | None  # текущий интервал
+    next_start: datetime.datetime  # начало следующего периода
+    next_temp: float               # уставка следующего периода, °C
+    change_at: datetime.datetime   # ближайшая граница (конец текущего или начало следующего)
+
+
+class ScheduleIndex:
+    """Интервалы расписания за неделю в отсортированных массивах.
+
+    Минуты отсчитываются от понедельника 00:00. Период длится до начала
+    следующего периода того же дня или до конца дня, как и на устройстве.
+    """
+
+    __slots__ = ("starts", "ends", "temps", "_times", "_summaries")
+
+    def __init__(self, schedule):
+        intervals = []
+        for day, periods in schedule.items():
+            try:
+                weekday = int(day)
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= weekday <= 6:
+                continue
+            valid = sorted((int(p[0]), int(p[1])) for p in periods if len(p) >= 2)
+            base = weekday * MINUTES_PER_DAY
+            for idx, (minute, temp) in enumerate(valid):
+                if idx + 1 < len(valid):
+                    end = valid[idx + 1][0]
+                else:
+                    end = MINUTES_PER_DAY
+                if end <= minute:
+                    continue
+                intervals.append((base + minute, base + end, temp))
+        intervals.sort()
+
+        self.starts = array("l", (i[0] for i in intervals))
+        self.ends = array("l", (i[1] for i in intervals))
+        self.temps = array("l", (i[2] for i in intervals))
+        # Время начала/конца внутри дня (конец дня - time.max, как раньше)
+        self._times = [
+            (_minute_time(start % MINUTES_PER_DAY), _end_time(end))
+            for start, end, _ in intervals
+        ]
+        self._summaries = [f"{temp / 10:.1f}°C" for _, _, temp in intervals]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def summary(self, idx: int) -> str:
+        return self._summaries[idx]
+
+    def temperature(self, idx: int) -> float:
+        return self.temps[idx] / 10
+
+    def state_at(self, moment: datetime.datetime, tz) -> ScheduleState | None:
+        """Текущий интервал и следующий переход (с переходом через полночь и неделю)."""
+        count = len(self.starts)
+        if not count:
+            return None
+        local = moment.astimezone(tz)
+        week_date = local.date() - timedelta(days=local.weekday())
+        offset = local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+        idx = bisect_right(self.starts, offset) - 1
+        event = None
+        if idx >= 0 and self.ends[idx] > offset:
+            start_minute = self.starts[idx]
+            day_date = week_date + timedelta(days=start_minute // MINUTES_PER_DAY)
+            start_time, end_time = self._times[idx]
+            event = (
+                datetime.datetime.combine(day_date, start_time, tzinfo=tz),
+                datetime.datetime.combine(day_date, end_time, tzinfo=tz),
+                idx,
+            )
+
+        next_idx, next_week = idx + 1, week_date
+        if next_idx >= count:
+            next_idx, next_week = 0, week_date + timedelta(days=7)
+        next_start = _at(next_week, self.starts[next_idx], tz)
+
+        change_at = next_start
+        if event is not None:
+            # Последний период дня без продолжения заканчивается в полночь
+            event_end = _at(week_date, self.ends[idx], tz)
+            if event_end < change_at:
+                change_at = event_end
+
+        return ScheduleState(event, next_start, self.temperature(next_idx), change_at)
+
+    def events(
+        self, start: datetime.datetime, end: datetime.datetime, tz
+    ) -> Iterator[tuple[datetime.datetime, datetime.datetime, int]]:
+        """Лениво перечислить интервалы (начало, конец, idx), пересекающие [start, end)."""
+        count = len(self.starts)
+        if not count:
+            return
+        local = start.astimezone(tz)
+        week_date = local.date() - timedelta(days=local.weekday())
+        offset = local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+        idx = bisect_right(self.ends, offset)
+        if idx >= count:
+            idx = 0
+            week_date += timedelta(days=7)
+
+        combine = datetime.datetime.combine
+        while True:
+            start_minute = self.starts[idx]
+            day_date = week_date + timedelta(days=start_minute // MINUTES_PER_DAY)
+            start_time, end_time = self._times[idx]
+            event_start = combine(day_date, start_time, tzinfo=tz)
+            if event_start >= end:
+                return
+            event_end = combine(day_date, end_time, tzinfo=tz)
+            if event_end > start:
+                yield event_start, event_end, idx
+            idx += 1
+            if idx >= count:
+                idx = 0
+                week_date += timedelta(days=7)
+
+
+def _at(week_date: datetime.date, minute: int, tz) -> datetime.datetime:
+    """Момент minute (от понедельника 00:00) недели, начинающейся с week_date."""
+    day_date = week_date + timedelta(days=minute // MINUTES_PER_DAY)
+    return datetime.datetime.combine(day_date, _minute_time(minute % MINUTES_PER_DAY), tzinfo=tz)
+
+
+def _minute_time(minute: int) -> datetime.time:
+    return datetime.time(minute // 60, minute % 60)
+
+
+def _end_time(end: int) -> datetime.time:
+    minute = end % MINUTES_PER_DAY
+    if minute == 0:
+        # Последний период дня заканчивается в конце дня
+        return datetime.time.max
+    return _minute_time(minute)
+
+
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def parse_day(day) -> str:
+    """Ключ дня в формате устройства: 0..6, "mon".."sun" или "monday".."sunday" → "0".."6"."""
+    key = str(day).strip().lower()
+    if key.isdigit() and 0 <= int(key) <= 6:
+        return str(int(key))
+    if len(key) >= 3:
+        for idx, name in enumerate(DAY_NAMES):
+            if name.startswith(key):
+                return str(idx)
+    raise ValueError(f"Unknown day: {day}")
+
+
+def parse_period(period) -> tuple[int, int]:
+    """Период ["06:30", 22.5] или {"time": "06:30", "temperature": 22.5} → (минута, °C×10)."""
+    if isinstance(period, dict):
+        start, temp = period.get("time"), period.get("temperature")
+    elif isinstance(period, (list, tuple)) and len(period) == 2:
+        start, temp = period
+    else:
+        raise ValueError(f"Invalid period: {period}")
+    if isinstance(start, str):
+        hours, _, minutes = start.partition(":")
+        try:
+            minute = int(hours) * 60 + int(minutes or 0)
+        except ValueError:
+            raise ValueError(f"Invalid time: {start}") from None
+    elif isinstance(start, int):
+        minute = start
+    else:
+        raise ValueError(f"Invalid time: {start}")
+    if not 0 <= minute < MINUTES_PER_DAY:
+        raise ValueError(f"Time out of range: {start}")
+    try:
+        temp = float(temp)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid temperature: {temp}") from None
+    if not SCHEDULE_TEMP_MIN <= temp <= SCHEDULE_TEMP_MAX:
+        raise ValueError(f"Temperature {temp} is outside {SCHEDULE_TEMP_MIN}..{SCHEDULE_TEMP_MAX}")
+    return minute, round(temp * 10)
+
+
+def normalize_day(periods) -> list[list[int]]:
+    """Периоды дня по времени; одинаковое время - побеждает последний,
+    соседние периоды с одной уставкой сливаются в один."""
+    by_minute = {}
+    for period in periods:
+        if len(period) >= 2:
+            by_minute[int(period[0])] = int(period[1])
+    result = []
+    for minute in sorted(by_minute):
+        temp = by_minute[minute]
+        if result and result[-1][1] == temp:
+            continue
+        result.append([minute, temp])
+    return result
+
+
+def parse_week(schedule: dict) -> dict[str, list[list[int]]]:
+    """Расписание из сервиса ({день: [период, ...]}) → нормализованные дни устройства."""
+    week = {}
+    for day, periods in schedule.items():
+        key = parse_day(day)
+        if not isinstance(periods, (list, tuple)) or not periods:
+            raise ValueError(f"Day {day} must have at least one period")
+        week[key] = normalize_day(parse_period(period) for period in periods)
+    return week
+
+
+def schedule_diff(current: dict, target: dict) -> dict[str, list[list[int]]]:
+    """Дни target, которые отличаются от current (с учетом нормализации)."""
+    return {
+        day: periods
+        for day, periods in target.items()
+        if normalize_day(current.get(day) or ()) != periods
+    }
+
+
+class TerneoScheduleTracker:
+    """Текущий период расписания устройства и таймер на следующий переход.
+
+    Один таймер на устройство (async_track_point_in_time) взводится на
+    ближайшую границу периода; между границами и опросами ничего не
+    пересчитывается. Подписчики (календарь, климат) оповещаются на каждой
+    границе и при смене расписания.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.state: ScheduleState | None = None
+        self._index: ScheduleIndex | None = None
+        self._schedule = None
+        self._listeners: list[Callable[[], None]] = []
+        self._unsub_coordinator: CALLBACK_TYPE | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def index(self) -> ScheduleIndex | None:
+        return self._index
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Подписаться на переходы расписания (state доступен сразу)."""
+        if self._unsub_coordinator is None:
+            self._unsub_coordinator = self.coordinator.async_add_listener(
+                self._handle_coordinator_update, frozenset({"schedule"})
+            )
+            self._handle_coordinator_update()
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+            if not self._listeners:
+                self._async_stop()
+
+        return remove_listener
+
+    @callback
+    def _async_stop(self) -> None:
+        if self._unsub_coordinator is not None:
+            self._unsub_coordinator()
+            self._unsub_coordinator = None
+        self._cancel_timer()
+        self._schedule = self._index = self.state = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        data = self.coordinator.data
+        schedule = data.schedule if data is not None else None
+        if schedule is self._schedule and self._unsub_timer is not None:
+            # Расписание то же - таймер уже взведен на нужную границу
+            return
+        self._schedule = schedule
+        self._index = self.coordinator.schedule_index
+        self._async_transition()
+
+    @callback
+    def _async_transition(self, now: datetime.datetime | None = None) -> None:
+        """Пересчитать текущий период и взвести таймер на следующую границу."""
+        self._cancel_timer()
+        now = dt_util.now()
+        state = self._index.state_at(now, now.tzinfo) if self._index is not None else None
+        self.state = state
+        if state is not None:
+            _LOGGER.debug(
+                "Schedule of %s: next change at %s (next setpoint %.1f°C)",
+                self.coordinator.host, state.change_at, state.next_temp,
+            )
+            self._unsub_timer = async_track_point_in_time(
+                self.hass, self._async_transition, state.change_at
+            )
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def _cancel_timer(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
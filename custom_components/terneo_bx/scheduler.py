@@ -0,0 +1,166 @@
+"""Единый планировщик опроса всех устройств Terneo."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_SCHEDULER, DEFAULT_MAX_CONCURRENT_POLLS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _ScheduledDevice:
+    """Состояние одного устройства в планировщике."""
+
+    __slots__ = ("coordinator", "phase", "due", "last_start", "polling")
+
+    def __init__(self, coordinator, last_start: float | None):
+        self.coordinator = coordinator
+        self.phase = 0.0  # доля интервала, 0..1
+        self.due = 0.0
+        self.last_start = last_start
+        self.polling = False
+
+
+class TerneoFleetScheduler:
+    """Разносит опросы устройств по фазам и ограничивает их параллельность.
+
+    Вместо собственного таймера у каждого координатора все устройства
+    опрашиваются из одного цикла: фазы распределены равномерно по
+    интервалу, а число одновременных опросов ограничено семафором.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_in_flight: int = DEFAULT_MAX_CONCURRENT_POLLS):
+        self.hass = hass
+        self.max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._devices: dict[str, _ScheduledDevice] = {}
+        self._anchor = hass.loop.time()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.in_flight = 0
+
+    @property
+    def device_count(self) -> int:
+        return len(self._devices)
+
+    @callback
+    def async_register(self, key: str, coordinator) -> None:
+        """Добавить устройство (после первого обновления)."""
+        self._devices[key] = _ScheduledDevice(coordinator, self.hass.loop.time())
+        self._rebalance()
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), "terneo_bx fleet scheduler"
+            )
+        self._wakeup.set()
+        _LOGGER.debug("Scheduler: registered %s (%d devices)", key, len(self._devices))
+
+    @callback
+    def async_unregister(self, key: str) -> None:
+        """Убрать устройство из планировщика."""
+        if self._devices.pop(key, None) is None:
+            return
+        self._rebalance()
+        self._wakeup.set()
+        _LOGGER.debug("Scheduler: unregistered %s (%d devices)", key, len(self._devices))
+
+    @callback
+    def async_reschedule(self, key: str) -> None:
+        """Пересчитать время следующего опроса (интервал устройства изменился)."""
+        device = self._devices.get(key)
+        if device is None or device.polling:
+            # Идет опрос: слот будет рассчитан по новому интервалу после него
+            return
+        device.due = self._next_slot(device, self.hass.loop.time())
+        self._wakeup.set()
+
+    async def async_first_refresh(self, coordinator) -> None:
+        """Первое обновление устройства с учетом общего лимита параллельности."""
+        async with self._semaphore:
+            await coordinator.async_config_entry_first_refresh()
+
+    def _rebalance(self) -> None:
+        """Равномерно распределить фазы опроса по интервалу."""
+        now = self.hass.loop.time()
+        keys = sorted(self._devices)
+        count = len(keys)
+        for index, key in enumerate(keys):
+            device = self._devices[key]
+            device.phase = index / count
+            if not device.polling:
+                device.due = self._next_slot(device, now)
+
+    def _next_slot(self, device: _ScheduledDevice, now: float) -> float:
+        """Ближайший слот устройства на сетке anchor + (k + phase) * interval."""
+        interval = max(1.0, device.coordinator.current_interval().total_seconds())
+        after = now
+        if device.last_start is not None:
+            # Не опрашиваем устройство чаще, чем раз в пол-интервала
+            after = max(now, device.last_start + interval / 2)
+        offset = self._anchor + device.phase * interval
+        slots = math.floor((after - offset) / interval) + 1
+        return offset + slots * interval
+
+    async def _async_run(self) -> None:
+        loop = self.hass.loop
+        while self._devices:
+            now = loop.time()
+            next_due = None
+            for device in list(self._devices.values()):
+                if device.polling:
+                    continue
+                if device.due <= now:
+                    device.polling = True
+                    self.hass.async_create_background_task(
+                        self._async_poll(device), "terneo_bx poll"
+                    )
+                elif next_due is None or device.due < next_due:
+                    next_due = device.due
+
+            self._wakeup.clear()
+            timeout = None if next_due is None else max(0.0, next_due - now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._task = None
+
+    async def _async_poll(self, device: _ScheduledDevice) -> None:
+        loop = self.hass.loop
+        try:
+            async with self._semaphore:
+                start = loop.time()
+                slip = start - device.due
+                device.last_start = start
+                device.coordinator.record_schedule_slip(slip)
+                interval = device.coordinator.current_interval().total_seconds()
+                if slip > interval / 2:
+                    _LOGGER.debug(
+                        "Poll of %s slipped by %.1fs (interval %.0fs)",
+                        device.coordinator.host, slip, interval,
+                    )
+                self.in_flight += 1
+                try:
+                    await device.coordinator.async_refresh()
+                finally:
+                    self.in_flight -= 1
+        except Exception as e:
+            _LOGGER.error(f"Scheduled poll of {device.coordinator.host} failed: {e}")
+        finally:
+            device.polling = False
+            device.due = self._next_slot(device, loop.time())
+            self._wakeup.set()
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> TerneoFleetScheduler:
+    """Вернуть общий планировщик, создав его при первом обращении."""
+    scheduler = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = TerneoFleetScheduler(hass)
+        hass.data[DATA_SCHEDULER] = scheduler
+    return scheduler
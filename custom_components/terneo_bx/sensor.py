@@ -1,11 +1,13 @@
 from __future__ import annotations
 import logging
 from datetime import datetime
+from operator import attrgetter
+from homeassistant.core import callback
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.restore_state import RestoreEntity
-from .const import DOMAIN, ENERGY_UPDATE_INTERVAL_MAX, ENERGY_MIN_INCREMENT
+from .const import DOMAIN
 from .api import TerneoApi, CannotConnect
 from .coordinator import TerneoCoordinator
 
@@ -18,6 +20,14 @@ SENSOR_DEFS = [
     ('wifi_rssi', None, SensorDeviceClass.SIGNAL_STRENGTH, 'dBm', SensorStateClass.MEASUREMENT),
 ]
 
+# key, окно (секунды), поле TerneoDutyCycleTracker.stats, единицы
+DUTY_SENSOR_DEFS = [
+    ('duty_cycle_1h', 3600, 'duty_cycle', '%'),
+    ('duty_cycle_24h', 86400, 'duty_cycle', '%'),
+    ('cycles_per_hour', 86400, 'cycles_per_hour', 'cycles/h'),
+    ('average_on_time', 86400, 'average_on_time', 's'),
+]
+
 
 async def async_setup_entry(hass, entry, async_add_entities):
     data = hass.data[DOMAIN][entry.entry_id]
@@ -36,6 +46,10 @@ async def async_setup_entry(hass, entry, async_add_entities):
     # Счетчик энергии
     entities.append(TerneoEnergySensor(coordinator, host, serial))
 
+    # Скважность реле
+    for key, length, stat, unit in DUTY_SENSOR_DEFS:
+        entities.append(TerneoDutyCycleSensor(coordinator, host, serial, key, length, stat, unit))
+
     # Диагностические сенсоры
     entities.append(TerneoApiErrorSensor(coordinator, api, host, serial))
     entities.append(TerneoApiResponseTimeSensor(coordinator, api, host, serial))
@@ -43,14 +57,37 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities(entities, update_before_add=True)
 
 
+class _WriteOnChangeMixin:
+    """Производные сенсоры (не поля снимка) пишут состояние только при смене значения.
+
+    Контекста у таких сенсоров нет - они получают каждое обновление
+    координатора, но записывают состояние, лишь когда меняется
+    _state_key (по умолчанию - доступность и отображаемое значение).
+    """
+
+    _written_key = None
+
+    def _state_key(self):
+        return self.available, self.native_value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        key = self._state_key()
+        if key == self._written_key:
+            return
+        self._written_key = key
+        self.async_write_ha_state()
+
+
 class TerneoCoordinatorSensor(CoordinatorEntity, SensorEntity):
     def __init__(self, coordinator: TerneoCoordinator, api: TerneoApi, host: str, serial: str, key: str, title: str, dev_class, unit: str | None, state_class):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset({key}))
         self.coordinator = coordinator
         self.api = api
         self._host = host
         self._serial = serial
         self._key = key
+        self._value = attrgetter(key)
         self._attr_has_entity_name = True
         self._attr_translation_key = key 
         self._attr_unique_id = f"terneo_{serial}_{key}"
@@ -69,7 +106,7 @@ class TerneoCoordinatorSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator.data.get(self._key)
+        return self._value(self.coordinator.data)
 
 
 class TerneoPowerSensor(CoordinatorEntity, SensorEntity):
@@ -80,7 +117,7 @@ class TerneoPowerSensor(CoordinatorEntity, SensorEntity):
     _attr_native_unit_of_measurement = "W"
 
     def __init__(self, coordinator: TerneoCoordinator, host: str, serial: str):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset({"power", "power_w"}))
         self._host = host
         self._serial = serial
         self._attr_has_entity_name = True
@@ -99,19 +136,18 @@ class TerneoPowerSensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self):
         """Возвращает мощность в ваттах (0 если реле выключено)."""
-        relay_state = self.coordinator.data.get('power', 0)
+        data = self.coordinator.data
         
-        if relay_state == 0:
+        if data.power == 0:
             return 0
         
-        power_w = self.coordinator.data.get('power_w', 0)
-        return power_w
+        return data.power_w
 
     @property
     def extra_state_attributes(self):
         """Дополнительные атрибуты для отладки."""
-        relay_state = self.coordinator.data.get('power', 0)
-        power_w = self.coordinator.data.get('power_w', 0)
+        relay_state = self.coordinator.data.power
+        power_w = self.coordinator.data.power_w
         
         return {
             "heating_active": relay_state == 1,
@@ -120,7 +156,7 @@ class TerneoPowerSensor(CoordinatorEntity, SensorEntity):
         }
 
 
-class TerneoEnergySensor(CoordinatorEntity, RestoreEntity, SensorEntity):
+class TerneoEnergySensor(_WriteOnChangeMixin, CoordinatorEntity, RestoreEntity, SensorEntity):
     """Счетчик энергии в kWh с сохранением состояния."""
     
     _attr_device_class = SensorDeviceClass.ENERGY
@@ -134,9 +170,6 @@ class TerneoEnergySensor(CoordinatorEntity, RestoreEntity, SensorEntity):
         self._attr_has_entity_name = True
         self._attr_translation_key = "energy"
         self._attr_unique_id = f"terneo_{serial}_energy_kwh"
-        self._total_energy = 0.0
-        self._last_update = None
-        self._last_power = 0
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -155,86 +188,114 @@ class TerneoEnergySensor(CoordinatorEntity, RestoreEntity, SensorEntity):
         last_state = await self.async_get_last_state()
         if last_state is not None and last_state.state not in (None, "unknown", "unavailable"):
             try:
-                self._total_energy = float(last_state.state)
-                _LOGGER.info(f"Restored energy counter for {self._host}: {self._total_energy} kWh")
-                
-                # Восстанавливаем атрибуты
-                if last_state.attributes:
-                    last_update_str = last_state.attributes.get("last_update")
-                    if last_update_str:
-                        try:
-                            self._last_update = datetime.fromisoformat(last_update_str)
-                        except (ValueError, TypeError) as e:
-                            _LOGGER.debug(f"Could not parse last_update: {e}")
-                            self._last_update = None
-                    
-                    self._last_power = last_state.attributes.get("current_power", 0)
-                    
+                total = float(last_state.state)
             except (ValueError, TypeError) as e:
                 _LOGGER.warning(f"Could not restore energy counter for {self._host}: {e}")
-                self._total_energy = 0.0
+                return
+
+            last_update = None
+            last_update_str = last_state.attributes.get("last_update")
+            if last_update_str:
+                try:
+                    last_update = datetime.fromisoformat(last_update_str).timestamp()
+                except (ValueError, TypeError) as e:
+                    _LOGGER.debug(f"Could not parse last_update: {e}")
+            power = last_state.attributes.get("current_power", 0) or 0
+
+            # Прибавляем то, что успели накопить до восстановления
+            energy = self.coordinator.energy
+            if energy.last_update is not None:
+                total += energy.total
+                last_update, power = energy.last_update, energy.power
+            energy.restore(total, power, last_update)
+            _LOGGER.info(f"Restored energy counter for {self._host}: {total} kWh")
         else:
             _LOGGER.info(f"No previous state found for energy counter {self._host}, starting from 0")
 
+    @callback
+    def async_reset(self):
+        """Обнулить счетчик (сервис reset_energy)."""
+        self.coordinator.energy.reset()
+        self.async_write_ha_state()
+
     @property
     def native_value(self):
         """Возвращает накопленную энергию в kWh."""
-        # Получаем текущую мощность (зависит от реле)
-        relay_state = self.coordinator.data.get('power', 0)
-        power_w = self.coordinator.data.get('power_w', 0)
-        
-        # Реальная мощность = 0 если реле выключено
-        current_power = power_w if relay_state == 1 else 0
-        
-        # Вычисляем приращение энергии
-        now = datetime.now()
-        if self._last_update is not None:
-            time_delta_seconds = (now - self._last_update).total_seconds()
-            
-            # Защита от аномально больших интервалов (больше 1 часа)
-            # Это предотвращает скачки при перезапуске HA
-            if time_delta_seconds > ENERGY_UPDATE_INTERVAL_MAX:
-                _LOGGER.debug(
-                    f"Large time gap detected for {self._host}: {time_delta_seconds:.2f}h. "
-                    f"Skipping energy calculation to prevent anomaly."
-                )
-            elif time_delta_seconds > 0:  # ← ДОБАВЛЕНО: защита от отрицательных значений
-                # Используем среднюю мощность между двумя измерениями (метод трапеций)
-                avg_power = (self._last_power + current_power) / 2
-                energy_increment_wh = (avg_power * time_delta_seconds) / 3600  # Вт*с → Вт*ч
-                energy_increment_kwh = energy_increment_wh / 1000  # Вт*ч → кВт*ч
-                self._total_energy += energy_increment_kwh
-                
-                if energy_increment_kwh > ENERGY_MIN_INCREMENT:  
-                    _LOGGER.debug(
-                        f"Energy {self._host}: "
-                        f"Δt={time_delta_seconds:.1f}s, "
-                        f"P_last={self._last_power}W, "
-                        f"P_now={current_power}W, "
-                        f"P_avg={avg_power:.1f}W, "
-                        f"+{energy_increment_wh:.2f}Wh, "
-                        f"total={self._total_energy:.3f}kWh"
-                    )
-        
-        self._last_update = now
-        self._last_power = current_power
-        
-        return round(self._total_energy, 3)
+        return round(self.coordinator.energy.total, 3)
+
+    def _state_key(self):
+        data = self.coordinator.data
+        return self.available, self.native_value, data is not None and data.power == 1
 
     @property
     def extra_state_attributes(self):
         """Дополнительные атрибуты."""
-        relay_state = self.coordinator.data.get('power', 0)
-        power_w = self.coordinator.data.get('power_w', 0)
-        current_power = power_w if relay_state == 1 else 0
-        
+        energy = self.coordinator.energy
+        last_update = energy.last_update
         return {
-            "last_update": self._last_update.isoformat() if self._last_update else None,
-            "current_power": current_power,
-            "heating_active": relay_state == 1,
+            "last_update": datetime.fromtimestamp(last_update).isoformat() if last_update else None,
+            "current_power": energy.power,
+            "heating_active": self.coordinator.data.power == 1,
         }
 
-class TerneoApiErrorSensor(CoordinatorEntity, SensorEntity):
+class TerneoDutyCycleSensor(_WriteOnChangeMixin, CoordinatorEntity, SensorEntity):
+    """Скважность реле и частота включений за скользящее окно."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:sine-wave"
+
+    def __init__(self, coordinator: TerneoCoordinator, host: str, serial: str, key: str, length: int, stat: str, unit: str):
+        super().__init__(coordinator)
+        self._host = host
+        self._serial = serial
+        self._length = length
+        self._stat = stat
+        self._attr_has_entity_name = True
+        self._attr_translation_key = key
+        self._attr_unique_id = f"terneo_{serial}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        if unit == 's':
+            self._attr_device_class = SensorDeviceClass.DURATION
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._host)},
+            name=f"Terneo {self._host}",
+            manufacturer="Terneo",
+            model="Terneo BX"
+        )
+
+    @property
+    def native_value(self):
+        stats = self.coordinator.duty.stats(self._length)
+        return stats[self._stat] if stats else None
+
+    @property
+    def extra_state_attributes(self):
+        """Статистика за окно 1ч для сенсоров 24ч и наоборот."""
+        duty = self.coordinator.duty
+        attributes = {"transitions": len(duty)}
+        for length in duty.windows:
+            stats = duty.stats(length)
+            if stats is None:
+                continue
+            suffix = f"{length // 3600}h"
+            attributes[f"{self._stat}_{suffix}"] = stats[self._stat]
+            attributes[f"window_{suffix}"] = round(stats["window"])
+        return attributes
+
+    def _state_key(self):
+        # Статистика другого окна - тоже состояние; длина окна, пока история
+        # растет, меняется на каждом опросе, поэтому сравнивается в минутах
+        attributes = self.extra_state_attributes
+        return self.available, self.native_value, tuple(
+            (name, round(value / 60) if name.startswith("window_") else value)
+            for name, value in attributes.items()
+        )
+
+
+class TerneoApiErrorSensor(_WriteOnChangeMixin, CoordinatorEntity, SensorEntity):
     """Сенсор количества ошибок API."""
     
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
@@ -263,16 +324,21 @@ class TerneoApiErrorSensor(CoordinatorEntity, SensorEntity):
         """Возвращает количество ошибок API."""
         return self.api.error_count
 
+    def _state_key(self):
+        return self.available, self.native_value, self.api.breaker.state
+
     @property
     def extra_state_attributes(self):
         """Дополнительные атрибуты."""
         return {
             "last_error": self.api.last_error,
             "last_success": self.api.last_success.isoformat() if self.api.last_success else None,
+            "circuit": self.api.breaker.state,
+            "circuit_retry_in": round(self.api.breaker.retry_in, 1),
         }
 
  
-class TerneoApiResponseTimeSensor(CoordinatorEntity, SensorEntity):
+class TerneoApiResponseTimeSensor(_WriteOnChangeMixin, CoordinatorEntity, SensorEntity):
     """Сенсор времени ответа API."""
     
     _attr_device_class = SensorDeviceClass.DURATION
@@ -300,15 +366,45 @@ class TerneoApiResponseTimeSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def native_value(self):
-        """Возвращает время ответа API в миллисекундах."""
-        if self.api.last_request_duration is not None:
-            return round(self.api.last_request_duration, 2)
-        return None
+        """Медиана времени ответа API за окно (мс), по всем командам."""
+        p50 = self.api.metrics.percentiles(points=(50,))[50]
+        # Целые мс: дробная часть - шум интерполяции внутри корзины
+        return round(p50) if p50 is not None else None
+
+    def _state_key(self):
+        # Хвосты задержек, очередь и отставание опроса видны только в атрибутах;
+        # значения, которые меняются на каждом опросе, сравниваются грубо
+        overall = self.api.metrics.percentiles()
+        channel = self.api.channel
+        slip = self.coordinator.schedule_slip
+        return (
+            self.available,
+            self.native_value,
+            round(overall[95]) if overall[95] is not None else None,
+            round(overall[99]) if overall[99] is not None else None,
+            channel.queue_depth,
+            round(channel.last_wait, 1),
+            round(channel.max_wait, 1),
+            channel.dropped,
+            round(slip, 1) if slip is not None else None,
+            round(self.coordinator.max_schedule_slip, 1),
+        )
 
     @property
     def extra_state_attributes(self):
         """Дополнительные атрибуты."""
+        overall = self.api.metrics.percentiles()
         return {
+            "p95": overall[95],
+            "p99": overall[99],
+            "last_request": round(self.api.last_request_duration, 2) if self.api.last_request_duration is not None else None,
+            "commands": self.api.metrics.summary(),
             "last_success": self.api.last_success.isoformat() if self.api.last_success else None,
             "host": self.api.host,
+            "queue_depth": self.api.channel.queue_depth,
+            "queue_wait": round(self.api.channel.last_wait * 1000, 2),
+            "max_queue_wait": round(self.api.channel.max_wait * 1000, 2),
+            "dropped_requests": self.api.channel.dropped,
+            "schedule_slip": round(self.coordinator.schedule_slip, 3) if self.coordinator.schedule_slip is not None else None,
+            "max_schedule_slip": round(self.coordinator.max_schedule_slip, 3),
         }
\ No newline at end of file
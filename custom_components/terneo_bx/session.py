@@ -0,0 +1,109 @@
+"""Общий HTTP-пул для всех устройств Terneo BX."""
+import logging
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_SESSION,
+    DATA_SESSION_UNSUB,
+    DATA_CHANNELS,
+    HTTP_LIMIT,
+    HTTP_LIMIT_PER_HOST,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+)
+from .api import TerneoApi
+from .channel import TerneoRequestChannel
+from .timeouts import create_trace_config
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Вернуть общую сессию, создав её при первом обращении."""
+    session = hass.data.get(DATA_SESSION)
+    if session is not None and not session.closed:
+        return session
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+    )
+    session = aiohttp.ClientSession(connector=connector, trace_configs=[create_trace_config()])
+    hass.data[DATA_SESSION] = session
+
+    async def _async_close(event):
+        hass.data.pop(DATA_SESSION_UNSUB, None)
+        await session.close()
+
+    # Слушатель снимается в async_close_session, иначе каждая новая сессия добавляла бы свой
+    hass.data[DATA_SESSION_UNSUB] = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    _LOGGER.debug("Created shared HTTP session for Terneo devices")
+    return session
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    """Закрыть общую сессию (после выгрузки последнего устройства)."""
+    for channel in hass.data.pop(DATA_CHANNELS, {}).values():
+        channel.close()
+    unsub = hass.data.pop(DATA_SESSION_UNSUB, None)
+    if unsub is not None:
+        unsub()
+    session = hass.data.pop(DATA_SESSION, None)
+    if session is not None and not session.closed:
+        await session.close()
+        _LOGGER.debug("Closed shared HTTP session for Terneo devices")
+
+
+@callback
+def async_get_channel(hass: HomeAssistant, host: str) -> TerneoRequestChannel:
+    """Вернуть очередь запросов устройства (одну на host)."""
+    channels = hass.data.setdefault(DATA_CHANNELS, {})
+    channel = channels.get(host)
+    if channel is None:
+        channel = channels[host] = TerneoRequestChannel(host)
+    return channel
+
+
+@callback
+def async_move_api(hass: HomeAssistant, api: TerneoApi, host: str) -> None:
+    """Перевести API и его очередь на новый адрес устройства."""
+    channels = hass.data.setdefault(DATA_CHANNELS, {})
+    if channels.get(api.host) is api.channel:
+        del channels[api.host]
+    stale = channels.get(host.rstrip("/"))
+    if stale is not None and stale is not api.channel:
+        # Очередь устройства, которое раньше занимало этот адрес
+        stale.close()
+    channels[host.rstrip("/")] = api.channel
+    api.set_host(host)
+
+
+@callback
+def async_release_channel(hass: HomeAssistant, api: TerneoApi) -> None:
+    """Убрать и остановить очередь API (запись устройства выгружена)."""
+    channels = hass.data.get(DATA_CHANNELS, {})
+    if channels.get(api.host) is api.channel:
+        del channels[api.host]
+    api.channel.close()
+
+
+@callback
+def async_create_api(
+    hass: HomeAssistant, host: str, sn: str | None = None, max_timeout: float | None = None
+) -> TerneoApi:
+    """Создать TerneoApi, работающий через общий пул и очередь устройства."""
+    return TerneoApi(
+        host,
+        sn=sn,
+        session=async_get_session(hass),
+        channel=async_get_channel(hass, host.rstrip("/")),
+        max_timeout=max_timeout,
+    )
@@ -0,0 +1,152 @@
+"""Компактный неизменяемый снимок состояния устройства."""
+from __future__ import annotations
+
+from typing import Any
+
+from .decoder import PARAM_SPECS, TELEMETRY_SPECS, DEFAULTS
+
+
+_SCALARS = (str, int, float, bool, type(None), tuple)
+
+
+class FrozenMap(dict):
+    """Неизменяемый словарь с кэшированным хэшем.
+
+    В хэш входят только скалярные значения: в телеметрии встречаются
+    списки и словари, которые не хэшируются. Равные словари все равно
+    получают равный хэш.
+    """
+
+    __slots__ = ("_hash",)
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(
+                (key, value) for key, value in self.items() if isinstance(value, _SCALARS)
+            ))
+            return self._hash
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenMap is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenMap, (dict(self),))
+
+
+EMPTY = FrozenMap()
+
+
+def freeze_schedule(tt: dict | None) -> FrozenMap:
+    """Расписание {"0": [[минута, темп], ...]} → неизменяемая структура."""
+    if not tt:
+        return EMPTY
+    return FrozenMap(
+        (str(day), tuple(tuple(period) for period in periods))
+        for day, periods in tt.items()
+    )
+
+
+# Именованные поля снимка - из таблиц декодера
+FIELDS = tuple(dict.fromkeys(
+    [spec.name for spec in PARAM_SPECS.values()]
+    + [spec.name for spec in TELEMETRY_SPECS.values()]
+))
+
+
+class TerneoSnapshot:
+    """Состояние устройства на момент опроса.
+
+    Все поля - атрибуты (temp_floor, target_temp, power, ...), плюс
+    params (все параметры по id), telemetry (все ключи телеметрии),
+    schedule и time. Неизменяемые части (расписание, параметры,
+    телеметрия) переиспользуются из предыдущего снимка, если не
+    изменились, поэтому сравнение обычно сводится к проверке `is`.
+    """
+
+    __slots__ = FIELDS + ("params", "telemetry", "schedule", "time", "_hash")
+
+    def __init__(self, fields: dict[str, Any], params: FrozenMap, telemetry: FrozenMap,
+                 schedule: FrozenMap = EMPTY, time=None):
+        setter = object.__setattr__
+        for name in FIELDS:
+            setter(self, name, fields.get(name, DEFAULTS.get(name)))
+        setter(self, "params", params)
+        setter(self, "telemetry", telemetry)
+        setter(self, "schedule", schedule)
+        setter(self, "time", time)
+
+    @classmethod
+    def build(cls, fields: dict[str, Any], schedule: FrozenMap, time, previous: TerneoSnapshot | None = None):
+        """Собрать снимок из полей декодера, разделяя неизменившиеся части с previous."""
+        params = FrozenMap(fields["params"])
+        telemetry = FrozenMap(fields["telemetry"])
+        if previous is not None:
+            if previous.params == params:
+                params = previous.params
+            if previous.telemetry == telemetry:
+                telemetry = previous.telemetry
+            if previous.schedule == schedule:
+                schedule = previous.schedule
+        return cls(fields, params, telemetry, schedule, time)
+
+    def replace(self, **changes) -> TerneoSnapshot:
+        """Копия снимка с измененными полями."""
+        fields = {name: getattr(self, name) for name in FIELDS}
+        fields.update((k, v) for k, v in changes.items() if k in FIELDS)
+        return TerneoSnapshot(
+            fields,
+            changes.get("params", self.params),
+            changes.get("telemetry", self.telemetry),
+            changes.get("schedule", self.schedule),
+            changes.get("time", self.time),
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TerneoSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("TerneoSnapshot is immutable")
+
+    def _key(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__[:-1])
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, TerneoSnapshot):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        # Только декодированные поля: params/telemetry/schedule - производные
+        # от тех же ответов, а их значения не обязательно хэшируемы
+        try:
+            return self._hash
+        except AttributeError:
+            value = hash(tuple(getattr(self, name) for name in FIELDS))
+            object.__setattr__(self, "_hash", value)
+            return value
+
+    def diff(self, other: TerneoSnapshot) -> set:
+        """Имена полей, отличающихся от other, и ("params", id) для параметров."""
+        changed = set()
+        for name in self.__slots__[:-1]:
+            old, new = getattr(other, name), getattr(self, name)
+            if old is not new and old != new:
+                changed.add(name)
+        if "params" in changed:
+            old_params, new_params = other.params, self.params
+            for param_id in old_params.keys() | new_params.keys():
+                if old_params.get(param_id) != new_params.get(param_id):
+                    changed.add(("params", param_id))
+        return changed
+
+    def __repr__(self) -> str:
+        return (
+            f"TerneoSnapshot(temp_air={self.temp_air}, temp_floor={self.temp_floor}, "
+            f"power={self.power}, target_temp={self.target_temp}, mode={self.mode})"
+        )
@@ -0,0 +1,136 @@
+"""Выгрузка часовой энергии и времени работы реле в долгосрочную статистику."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TerneoStatisticsExporter:
+    """Пачками отдает закрытые часы накопителя энергии в recorder.
+
+    Для каждого устройства ведутся две внешние статистики с суммой:
+    terneo_bx:energy_<serial> (кВт*ч) и terneo_bx:relay_on_<serial> (часы
+    включенного реле). Панель энергии и выборки за год читают готовые
+    часы, а не перебирают состояния сенсора.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        key = self._statistic_key(coordinator)
+        # Без ключа устройства статистику не ведем: иначе ряды разных устройств смешаются
+        self.energy_id = f"{DOMAIN}:energy_{key}" if key else None
+        self.relay_on_id = f"{DOMAIN}:relay_on_{key}" if key else None
+        self._sums: dict[str, tuple[float, float]] | None = None  # id -> (сумма, начало последнего часа)
+        self._task: asyncio.Task | None = None
+        self.flushed_hours = 0
+
+    @staticmethod
+    def _statistic_key(coordinator) -> str | None:
+        """Часть statistic_id: serial, а без него - id записи конфигурации."""
+        if coordinator.serial:
+            key = str(coordinator.serial)
+        elif getattr(coordinator, "config_entry", None) is not None:
+            key = f"entry_{coordinator.config_entry.entry_id}"
+        else:
+            return None
+        return re.sub(r"[^a-z0-9_]", "_", key.lower())
+
+    @callback
+    def async_schedule_flush(self) -> None:
+        """Выгрузить закрытые часы в фоне (не чаще одной выгрузки за раз)."""
+        if self._task is not None and not self._task.done():
+            return
+        if self.energy_id is None:
+            return
+        if "recorder" not in self.hass.config.components:
+            # Без recorder корзины просто вытесняются по лимиту
+            return
+        self._task = self.hass.async_create_background_task(
+            self.async_flush(), f"{DOMAIN} statistics {self.coordinator.host}"
+        )
+
+    async def async_flush(self) -> None:
+        """Отдать все закрытые часы одним вызовом на статистику."""
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        energy = self.coordinator.energy
+        if not energy.has_closed_hours:
+            return
+        if self._sums is None:
+            self._sums = await self._async_load_sums()
+
+        hours = energy.pop_closed_hours()
+        energy_stats = self._build(self.energy_id, StatisticData, ((h, kwh) for h, kwh, _ in hours))
+        relay_stats = self._build(self.relay_on_id, StatisticData, ((h, on / 3600) for h, _, on in hours))
+
+        name = f"Terneo {self.coordinator.host}"
+        if energy_stats:
+            async_add_external_statistics(self.hass, StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{name} energy",
+                source=DOMAIN,
+                statistic_id=self.energy_id,
+                unit_of_measurement="kWh",
+            ), energy_stats)
+        if relay_stats:
+            async_add_external_statistics(self.hass, StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{name} relay on time",
+                source=DOMAIN,
+                statistic_id=self.relay_on_id,
+                unit_of_measurement="h",
+            ), relay_stats)
+        self.flushed_hours += len(hours)
+        _LOGGER.debug("Imported %d hour(s) of statistics for %s", len(hours), self.coordinator.host)
+
+    def _build(self, statistic_id: str, statistic_data, values) -> list:
+        """Часовые приращения → записи с нарастающей суммой."""
+        total, last_start = self._sums.get(statistic_id, (0.0, 0.0))
+        stats = []
+        for hour, value in values:
+            if hour <= last_start:
+                # Этот час уже есть в базе (например, до перезапуска)
+                continue
+            total += value
+            last_start = hour
+            stats.append(statistic_data(
+                start=datetime.fromtimestamp(hour, tz=timezone.utc),
+                state=round(total, 6),
+                sum=round(total, 6),
+            ))
+        self._sums[statistic_id] = (total, last_start)
+        return stats
+
+    async def _async_load_sums(self) -> dict[str, tuple[float, float]]:
+        """Последние суммы из базы, чтобы продолжить ряд после перезапуска."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        sums = {}
+        for statistic_id in (self.energy_id, self.relay_on_id):
+            try:
+                last = await get_instance(self.hass).async_add_executor_job(
+                    get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+                )
+            except Exception as e:
+                _LOGGER.warning(f"Could not read last statistics for {statistic_id}: {e}")
+                last = {}
+            rows = last.get(statistic_id)
+            if rows:
+                start = rows[0]["start"]
+                if isinstance(start, datetime):
+                    start = start.timestamp()
+                sums[statistic_id] = (rows[0].get("sum") or 0.0, float(start))
+        return sums
@@ -1,6 +1,5 @@
 from __future__ import annotations
 import logging
-import asyncio
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
@@ -25,7 +24,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
         TerneoPreheatSwitch(coordinator, api, host, serial),
     ]
 
-    params = coordinator.data.get("params_dict", {})
+    params = coordinator.data.params
     if 122 in params:
         switches.append(
             TerneoWindowControlSwitch(coordinator, api, host, serial)
@@ -43,7 +42,7 @@ class TerneoBaseSwitch(CoordinatorEntity, SwitchEntity):
     _attr_has_entity_name = True
     
     def __init__(self, coordinator: TerneoCoordinator, api: TerneoApi, host: str, serial: str, param_id: int, translation_key: str, icon: str):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset({("params", param_id)}))
         self.api = api
         self._host = host
         self._serial = serial
@@ -64,8 +63,7 @@ class TerneoBaseSwitch(CoordinatorEntity, SwitchEntity):
     @property
     def is_on(self) -> bool:
         """Return true if switch is on."""
-        params_dict = self.coordinator.data.get("params_dict", {})
-        value = params_dict.get(self._param_id)
+        value = self.coordinator.data.params.get(self._param_id)
         
         if value is None:
             return False
@@ -79,10 +77,7 @@ class TerneoBaseSwitch(CoordinatorEntity, SwitchEntity):
         """Turn the switch on."""
         try:
             _LOGGER.debug(f"Turning on switch: param_id={self._param_id}, translation_key={self._attr_translation_key}")
-            await self.api.set_parameter(self._param_id, 1, self._serial)
-            
-            await asyncio.sleep(self.coordinator.calc_delay())
-            await self.coordinator.async_refresh()
+            await self.coordinator.async_write_parameters({self._param_id: 1})
             
         except CannotConnect as e:
             _LOGGER.error(f"Cannot connect to turn on switch (param_id={self._param_id}): {e}")
@@ -93,10 +88,7 @@ class TerneoBaseSwitch(CoordinatorEntity, SwitchEntity):
         """Turn the switch off."""
         try:
             _LOGGER.debug(f"Turning off switch: param_id={self._param_id}, translation_key={self._attr_translation_key}")
-            await self.api.set_parameter(self._param_id, 0, self._serial)
-            
-            await asyncio.sleep(self.coordinator.calc_delay())
-            await self.coordinator.async_refresh()
+            await self.coordinator.async_write_parameters({self._param_id: 0})
             
         except CannotConnect as e:
             _LOGGER.error(f"Cannot connect to turn off switch (param_id={self._param_id}): {e}")
@@ -0,0 +1,135 @@
+"""Адаптивные таймауты подключения и чтения по наблюдаемой задержке устройства."""
+from __future__ import annotations
+
+import time
+
+import aiohttp
+
+from .const import (
+    TIMEOUT_CONNECT_MIN,
+    TIMEOUT_CONNECT_MAX,
+    TIMEOUT_READ_MIN,
+    TIMEOUT_READ_MAX,
+    TIMEOUT_DEVIATION_K,
+    TIMEOUT_MAX_BACKOFF,
+)
+
+# Сглаживание как у TCP (RFC 6298): alpha = 1/8, beta = 1/4
+_ALPHA = 0.125
+_BETA = 0.25
+
+
+class RttEstimator:
+    """Скользящая оценка задержки: srtt + k·rttvar в границах [low, high].
+
+    Пока отсчетов нет, таймаут равен верхней границе. После таймаута
+    оценка временно удваивается (до TIMEOUT_MAX_BACKOFF раз), как при
+    повторной передаче в TCP, и возвращается к норме с первым отсчетом.
+    """
+
+    __slots__ = ("low", "high", "srtt", "rttvar", "samples", "_backoff")
+
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.samples = 0
+        self._backoff = 1
+
+    def record(self, sample: float) -> None:
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar += _BETA * (abs(self.srtt - sample) - self.rttvar)
+            self.srtt += _ALPHA * (sample - self.srtt)
+        self.samples += 1
+        self._backoff = 1
+
+    def record_timeout(self) -> None:
+        self._backoff = min(self._backoff * 2, TIMEOUT_MAX_BACKOFF)
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.high
+        value = (self.srtt + TIMEOUT_DEVIATION_K * self.rttvar) * self._backoff
+        return min(self.high, max(self.low, value))
+
+    def as_dict(self) -> dict:
+        return {
+            "srtt_ms": round(self.srtt * 1000, 1) if self.srtt is not None else None,
+            "rttvar_ms": round(self.rttvar * 1000, 1),
+            "timeout": round(self.timeout, 3),
+            "samples": self.samples,
+        }
+
+
+class TerneoTimeouts:
+    """Таймауты одного устройства: подключение - общее, чтение - по типу команды.
+
+    Разные команды прошивка обрабатывает с разной скоростью (запись
+    параметров заметно медленнее телеметрии), поэтому ответ оценивается
+    отдельно для каждого типа.
+    """
+
+    def __init__(self, max_timeout: float | None = None):
+        read_max = max_timeout or TIMEOUT_READ_MAX
+        self.connect = RttEstimator(TIMEOUT_CONNECT_MIN, min(TIMEOUT_CONNECT_MAX, read_max))
+        self._read_bounds = (min(TIMEOUT_READ_MIN, read_max), read_max)
+        self.read: dict[str, RttEstimator] = {}
+
+    def _read(self, kind: str) -> RttEstimator:
+        estimator = self.read.get(kind)
+        if estimator is None:
+            estimator = self.read[kind] = RttEstimator(*self._read_bounds)
+        return estimator
+
+    def client_timeout(self, kind: str) -> aiohttp.ClientTimeout:
+        connect = self.connect.timeout
+        read = self._read(kind).timeout
+        return aiohttp.ClientTimeout(total=connect + read, sock_connect=connect, sock_read=read)
+
+    def record(self, kind: str, total: float, connect: float | None) -> None:
+        """Учесть успешный запрос: полное время и время подключения (если было)."""
+        if connect is not None:
+            self.connect.record(connect)
+            total -= connect
+        self._read(kind).record(max(0.0, total))
+
+    def record_timeout(self, kind: str, connected: bool) -> None:
+        """Таймаут: до подключения - растет таймаут подключения, иначе - чтения."""
+        if connected:
+            self._read(kind).record_timeout()
+        else:
+            self.connect.record_timeout()
+
+    def as_dict(self) -> dict:
+        return {
+            "connect": self.connect.as_dict(),
+            "read": {kind: estimator.as_dict() for kind, estimator in self.read.items()},
+        }
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Трассировка, записывающая время установки соединения в trace_request_ctx."""
+
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.monotonic()
+
+    async def on_connection_create_end(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, dict):
+            timing["connect"] = time.monotonic() - context.connect_started
+
+    async def on_connection_reuseconn(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, dict):
+            timing["reused"] = True
+
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(on_connection_create_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace
@@ -0,0 +1,62 @@
+"""Websocket-команды интеграции."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, TELEMETRY_HISTORY_MAX_BUCKETS
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, ws_telemetry_history)
+
+
+def _timestamp(value: str | None) -> float | None:
+    if value is None:
+        return None
+    parsed = dt_util.parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid datetime: {value}")
+    return dt_util.as_utc(parsed).timestamp()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/telemetry_history",
+        vol.Required("entity_id"): str,
+        vol.Optional("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("buckets", default=300): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=TELEMETRY_HISTORY_MAX_BUCKETS)
+        ),
+    }
+)
+@callback
+def ws_telemetry_history(hass: HomeAssistant, connection, msg: dict) -> None:
+    """История телеметрии устройства, свернутая в корзины min/max/mean."""
+    entity_entry = er.async_get(hass).async_get(msg["entity_id"])
+    entry_data = (
+        hass.data.get(DOMAIN, {}).get(entity_entry.config_entry_id)
+        if entity_entry is not None else None
+    )
+    if not entry_data:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Terneo device not found")
+        return
+
+    try:
+        start = _timestamp(msg.get("start_time"))
+        end = _timestamp(msg.get("end_time"))
+    except ValueError as e:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(e))
+        return
+
+    coordinator = entry_data["coordinator"]
+    result = coordinator.history.downsample(start, end, msg["buckets"])
+    result["series"] = list(coordinator.history.series)
+    result["serial"] = coordinator.serial
+    connection.send_result(msg["id"], result)
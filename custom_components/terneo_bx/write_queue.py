@@ -0,0 +1,136 @@
+"""Очередь записи параметров с объединением запросов."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from .const import WRITE_DEBOUNCE, WRITE_MAX_DELAY
+from .channel import PRIORITY_WRITE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TerneoWriteQueue:
+    """Объединяет записи параметров одного устройства в один cmd=1.
+
+    Записи, сделанные в пределах окна WRITE_DEBOUNCE (но не дольше
+    WRITE_MAX_DELAY от первой), уходят одним set_parameters; при повторной
+    записи того же параметра побеждает последнее значение.
+
+    Значения сразу применяются к данным координатора (оптимистично), а
+    после записи проверяются одним чтением cmd=1 только по записанным id.
+    При ошибке записи откатываются к прежним те значения, которые не
+    перезаписала следующая пачка; при ошибке только чтения записанные
+    значения остаются, при расхождении - берутся те, что вернуло устройство.
+    """
+
+    def __init__(self, coordinator, debounce: float = WRITE_DEBOUNCE, max_delay: float = WRITE_MAX_DELAY):
+        self.coordinator = coordinator
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._pending: dict[int, Any] = {}
+        self._rollback: dict[int, Any] = {}
+        self._waiters: list[asyncio.Future] = []
+        self._first_at: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+        self.writes = 0
+        self.merged = 0
+        self.mismatches = 0
+        self.rollbacks = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def async_write(self, params: dict[int, Any]) -> None:
+        """Поставить параметры в очередь и дождаться их записи."""
+        loop = self.coordinator.hass.loop
+        now = loop.time()
+        if self._first_at is None:
+            self._first_at = now
+        self.merged += len(params.keys() & self._pending.keys())
+        self._pending.update(params)
+
+        # Оптимистично показываем новые значения сразу
+        previous = self.coordinator.async_apply_params(params)
+        for param_id, value in previous.items():
+            self._rollback.setdefault(param_id, value)
+
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = min(self._debounce, max(0.0, self._first_at + self._max_delay - now))
+        self._timer = loop.call_later(delay, self._start_flush)
+
+        await waiter
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        self.coordinator.hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        async with self._lock:
+            params, rollback, waiters = self._pending, self._rollback, self._waiters
+            self._pending, self._rollback, self._waiters, self._first_at = {}, {}, [], None
+            if not params:
+                return
+
+            api = self.coordinator.api
+            _LOGGER.debug(f"Writing {params} to {self.coordinator.host} ({len(waiters)} requests merged)")
+            try:
+                await api.set_parameters(params, sn=self.coordinator.serial)
+            except Exception as e:
+                _LOGGER.warning(f"Write {params} to {self.coordinator.host} failed, rolling back: {e}")
+                self.rollbacks += 1
+                # Значения, которые уже перезаписала следующая пачка, не трогаем
+                self.coordinator.async_rollback_params(
+                    {pid: value for pid, value in rollback.items() if pid not in self._pending},
+                    params,
+                )
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                return
+            self.writes += 1
+
+            try:
+                # Подтверждение - одно чтение параметров, сверяем только записанные id
+                readback = await api.get_params(PRIORITY_WRITE)
+            except Exception as e:
+                # Запись прошла - записанные значения остаются, сверит следующий опрос
+                _LOGGER.debug(f"Readback after writing {params} to {self.coordinator.host} failed: {e}")
+                readback = None
+            if readback is None:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                return
+
+            actual = {pid: api.extract_param(readback, pid) for pid in params}
+            mismatched = {
+                pid: value for pid, value in actual.items()
+                if value is None or str(value) != str(params[pid])
+            }
+            if mismatched:
+                _LOGGER.warning(
+                    f"Device {self.coordinator.host} did not accept {params}, reported {mismatched}"
+                )
+                self.mismatches += 1
+
+            par = readback.get("par") if isinstance(readback, dict) else None
+            if isinstance(par, list):
+                # Чтение после записи - самые свежие параметры устройства (в т.ч.
+                # расхождения); записи, ждущие в очереди, остаются поверх
+                self.coordinator.async_apply_readback(par, dict(self._pending))
+            elif mismatched:
+                self.coordinator.async_apply_params(
+                    {pid: value if value is not None else rollback.get(pid) for pid, value in mismatched.items()}
+                )
+
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)